@@ -0,0 +1,159 @@
+import io
+import csv
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+except ImportError:  # Falls back to the csv module when pyarrow is not installed
+    pa = None
+    pa_csv = None
+
+# --- Configuration ---
+BLOCK_SIZE = 16 << 20        # bytes parsed per Arrow block (one batch of records)
+FALLBACK_BATCH_ROWS = 50000  # rows per batch when reading with the csv module
+
+# Canonical field names used by every check_logic
+CANONICAL_FIELDS = ['Contact_ID', 'Date', 'Agent_Time', 'Skill', 'Note']
+
+# --- Schema Profiles ---
+# Each profile maps canonical field -> column name in that export format.
+SCHEMA_PROFILES = {
+    # report.csv (check_security.py, checkSecurity_new.py, check_security_updated)
+    'report': {
+        'Contact_ID': 'Contact_ID',
+        'Date': 'Date',
+        'Agent_Time': 'Agent_Time',
+        'Skill': 'Skill',
+        'Note': 'Note',
+    },
+    # Data.csv (updated_autosummary_check.py)
+    'autosummary': {
+        'Contact_ID': 'Contact_ID',
+        'Agent_Time': 'Agent_time',
+        'Skill': 'Skill_Name',
+        'Note': 'Disp_Comments',
+    },
+}
+
+
+def read_header(path):
+    """Returns the column names of a CSV file."""
+    with open(path, mode='r', encoding='utf-8-sig', newline='') as f:
+        return next(csv.reader(f), [])
+
+
+def detect_profile(path):
+    """Picks the first profile whose Contact_ID and Note columns exist in the file."""
+    header = set(read_header(path))
+    for name, mapping in SCHEMA_PROFILES.items():
+        if mapping['Contact_ID'] in header and mapping['Note'] in header:
+            return name
+    raise ValueError(f"No schema profile matches the columns of {path}")
+
+
+def source_fieldnames(profile):
+    """Column names of the export format, in canonical order (for writing reports back)."""
+    mapping = SCHEMA_PROFILES[profile]
+    return [mapping[field] for field in CANONICAL_FIELDS if field in mapping]
+
+
+def report_fieldnames(header, profile):
+    """NG report columns: every column of the export (as read), then Reason_for_Error."""
+    fieldnames = list(header or []) or source_fieldnames(profile)
+    if 'Reason_for_Error' not in fieldnames:
+        fieldnames.append('Reason_for_Error')
+    return fieldnames
+
+
+def _extra_columns(header, mapping):
+    """Export columns outside the profile; carried through under their own names."""
+    mapped = set(mapping.values()) | set(mapping)
+    return [name for name in header if name and name not in mapped]
+
+
+def to_canonical_row(row, profile):
+    """
+    Renames a raw row (export column names) to canonical field names.
+    Columns outside the profile are kept under their original names.
+    """
+    mapping = SCHEMA_PROFILES[profile]
+    record = {name: (row.get(name) or '') for name in _extra_columns(row, mapping)}
+    record.update({field: (row.get(source) or '') for field, source in mapping.items()})
+    return record
+
+
+def to_source_row(record, profile):
+    """Renames a canonical record back to the export's column names."""
+    mapping = SCHEMA_PROFILES[profile]
+    return {mapping.get(key, key): value for key, value in record.items()}
+
+
+def _arrow_batches(path, profile):
+    mapping = SCHEMA_PROFILES[profile]
+    header = read_header(path)
+    # Every column is read as text, so extra columns go to the NG report unchanged
+    columns = list(dict.fromkeys(header + list(mapping.values())))
+
+    # Rows with a different number of columns are set aside instead of failing
+    # the whole file, then parsed the way csv.DictReader would
+    malformed = []
+
+    def set_aside(row):
+        malformed.append(row.text)
+        return 'skip'
+
+    reader = pa_csv.open_csv(
+        path,
+        read_options=pa_csv.ReadOptions(use_threads=True, block_size=BLOCK_SIZE),
+        # Notes often contain line breaks inside quotes
+        parse_options=pa_csv.ParseOptions(newlines_in_values=True, invalid_row_handler=set_aside),
+        convert_options=pa_csv.ConvertOptions(
+            include_columns=columns,
+            include_missing_columns=True,
+            column_types={c: pa.string() for c in columns},
+            strings_can_be_null=False,
+        ),
+    )
+    for batch in reader:
+        if batch.num_rows == 0:
+            continue
+        # Column-wise conversion: one list per column instead of one dict per parsed row
+        values = {name: batch.column(name).to_pylist() for name in columns}
+        yield [
+            to_canonical_row({name: values[name][i] for name in columns}, profile)
+            for i in range(batch.num_rows)
+        ]
+
+    if malformed:
+        print(f"Warning: {len(malformed)} row(s) of {path} have an unexpected number of columns")
+        rows = csv.DictReader(io.StringIO('\n'.join(malformed)), fieldnames=header)
+        yield [to_canonical_row(row, profile) for row in rows]
+
+
+def _csv_batches(path, profile):
+    with open(path, mode='r', encoding='utf-8-sig', newline='') as f:
+        reader = csv.DictReader(f)
+        batch = []
+        for row in reader:
+            batch.append(to_canonical_row(row, profile))
+            if len(batch) >= FALLBACK_BATCH_ROWS:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+
+def read_batches(path, profile=None):
+    """
+    Streams an export as batches of records keyed by canonical field names.
+    Columns outside the profile keep their export names (see report_fieldnames);
+    all values are strings ('' when empty).
+    Uses the multithreaded Arrow CSV reader when pyarrow is available.
+    """
+    if profile is None:
+        profile = detect_profile(path)
+
+    if pa_csv is not None:
+        yield from _arrow_batches(path, profile)
+    else:
+        yield from _csv_batches(path, profile)
@@ -0,0 +1,135 @@
+import io
+import os
+import csv
+import glob
+import json
+import hashlib
+
+# --- Configuration ---
+CHECKPOINT_FILE = 'watch_offsets.json'   # byte offset reached in every watched file
+MAX_BATCH_BYTES = 4 << 20                # read at most this much per file per poll (micro-batch)
+FINGERPRINT_BYTES = 4096                 # bytes before the offset that identify an already-read file
+
+
+def _fingerprint(f, offset):
+    """Hash of the bytes just before offset (unchanged while a file only grows)."""
+    start = max(0, offset - FINGERPRINT_BYTES)
+    f.seek(start)
+    return hashlib.sha1(f.read(offset - start)).hexdigest()
+
+
+def _same_file(f, stat, state):
+    """True if the file is the one the state was taken from, possibly grown since."""
+    if stat.st_size < state['offset']:
+        return False
+    if 'inode' not in state:
+        return True   # checkpoint written before file identities were kept
+    return stat.st_ino == state['inode'] and _fingerprint(f, state['offset']) == state['fingerprint']
+
+
+def _parse_records(data, header):
+    """
+    Splits bytes into complete CSV records.
+    Returns (records, bytes consumed, header); the first record of a file is its header.
+    """
+    records = []
+    pending_lines = []
+    consumed = 0
+
+    # Split on \n only: splitlines() would also break at a bare \r inside a quoted note
+    for line in io.BytesIO(data).readlines():
+        if not line.endswith(b'\n'):
+            break  # partial line still being written
+        pending_lines.append(line)
+        text = b''.join(pending_lines)
+        # An odd number of quotes means a quoted field continues on the next line
+        if text.count(b'"') % 2:
+            continue
+        consumed += len(text)
+        pending_lines = []
+
+        encoding = 'utf-8-sig' if header is None else 'utf-8'
+        values = next(csv.reader(io.StringIO(text.decode(encoding))), [])
+        if header is None:
+            header = values
+        elif values:
+            records.append(dict(zip(header, values)))
+    return records, consumed, header
+
+
+class CsvTailer:
+    """
+    Tails new or growing CSV files in an inbox directory.
+    Only complete records are returned (a record may span lines inside quotes);
+    the byte offset after the last complete record is checkpointed on commit(),
+    so a restart resumes where the previous run stopped. The checkpoint also
+    keeps the file's inode and a hash of the bytes just before the offset; a
+    file replaced under the same name (even by a larger one) is read from the start.
+    """
+
+    def __init__(self, checkpoint_file=CHECKPOINT_FILE):
+        self.checkpoint_file = checkpoint_file
+        self.offsets = {}
+        self.pending = {}
+        if os.path.exists(checkpoint_file):
+            with open(checkpoint_file, mode='r', encoding='utf-8') as f:
+                self.offsets = json.load(f)
+
+    def poll(self, inbox, pattern='*.csv'):
+        """Yields (path, rows) for every file that has new complete records."""
+        for path in sorted(glob.glob(os.path.join(inbox, pattern))):
+            rows = self._read_new(path)
+            if rows:
+                yield path, rows
+
+    def _read_new(self, path):
+        state = self.pending.get(path) or self.offsets.get(path) or {'offset': 0, 'header': None}
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return []
+
+        with open(path, mode='rb') as f:
+            # File was replaced or truncated: start over
+            if not _same_file(f, stat, state):
+                state = {'offset': 0, 'header': None}
+            if stat.st_size == state['offset']:
+                return []
+
+            f.seek(state['offset'])
+            data = b''
+            while True:
+                chunk = f.read(MAX_BATCH_BYTES)
+                data += chunk
+                records, consumed, header = _parse_records(data, state['header'])
+                # A record larger than MAX_BATCH_BYTES: keep reading until it is complete
+                if consumed or len(chunk) < MAX_BATCH_BYTES:
+                    break
+
+            offset = state['offset'] + consumed
+            self.pending[path] = {
+                'offset': offset,
+                'header': header,
+                'inode': stat.st_ino,
+                'fingerprint': _fingerprint(f, offset),
+            }
+        return records
+
+    def header(self, path):
+
+        """Column names of a tailed file (None before its header line was read)."""
+        state = self.pending.get(path) or self.offsets.get(path) or {}
+        return state.get('header')
+
+    def rollback(self):
+        """Forgets everything returned by poll() since the last commit(); it is read again."""
+        self.pending = {}
+
+    def commit(self):
+        """Marks everything returned by poll() as processed and saves the offsets."""
+        self.offsets.update(self.pending)
+        self.pending = {}
+        tmp_path = self.checkpoint_file + '.tmp'
+        with open(tmp_path, mode='w', encoding='utf-8') as f:
+            json.dump(self.offsets, f, indent=2)
+        os.replace(tmp_path, self.checkpoint_file)
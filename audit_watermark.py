@@ -0,0 +1,150 @@
+import os
+import csv
+import json
+import hashlib
+from datetime import datetime, timedelta
+
+# --- Configuration ---
+STATE_FILE = 'audit_state.json'      # watermark + cumulative scanned count
+INDEX_FILE = 'scanned_index.csv'     # Contact_ID, Date, Note_Hash of every scanned record
+DATE_FORMAT = '%m/%d/%Y'
+LOOKBACK_DAYS = 35                   # records older than watermark - LOOKBACK_DAYS are treated as final
+
+
+def note_hash(note):
+    """Short fingerprint of a note so edited notes are rescanned."""
+    return hashlib.sha1(note.strip().encode('utf-8')).hexdigest()[:16]
+
+
+def parse_date(value):
+    try:
+        return datetime.strptime(value.strip(), DATE_FORMAT)
+    except (ValueError, AttributeError):
+        return None
+
+
+class ScanWatermark:
+    """
+    Remembers which records were already audited as (Contact_ID, Date, note hash),
+    so a run only scans new or changed rows (several notes may share a
+    Contact_ID and Date; an edited note gets a new hash and is scanned again).
+    The watermark (latest Date seen) bounds the index: entries older than
+    watermark - LOOKBACK_DAYS are dropped and such records are no longer rescanned.
+    checkpoint() appends only the entries added since the last write;
+    save() rewrites and prunes the whole index.
+    """
+
+    def __init__(self, state_file=STATE_FILE, index_file=INDEX_FILE):
+        self.state_file = state_file
+        self.index_file = index_file
+        self.state = {'watermark': None, 'total_scanned': 0, 'last_run': None}
+        self.index = set()
+        self.changed = []   # entries not yet written to index_file
+
+        if os.path.exists(state_file):
+            with open(state_file, mode='r', encoding='utf-8') as f:
+                self.state.update(json.load(f))
+        if os.path.exists(index_file):
+            with open(index_file, mode='r', encoding='utf-8', newline='') as f:
+                for row in csv.DictReader(f):
+                    if row.get('Note_Hash'):   # skips a line cut short by a crash during checkpoint()
+                        self.index.add((row['Contact_ID'], row['Date'], row['Note_Hash']))
+
+        self.watermark = parse_date(self.state['watermark'] or '')
+        # Fixed for the whole run so row order inside a file does not matter
+        self.run_cutoff = self.cutoff
+        self.new_records = 0
+        self.skipped = 0
+
+    @property
+    def cutoff(self):
+        return self.watermark - timedelta(days=LOOKBACK_DAYS) if self.watermark else None
+
+    @property
+    def total_scanned(self):
+        """Distinct notes audited across all runs (denominator of the NG rate)."""
+        return self.state['total_scanned'] + self.new_records
+
+    def select(self, rows, full=False):
+        """
+        Returns the rows that need scanning and records them in the index.
+        With full=True every row is rescanned (e.g. after a rule change),
+        but records already counted are not counted twice. Records older than
+        the cutoff are never counted: they were counted when first scanned and
+        have since been pruned from the index.
+        """
+        selected = []
+        for row in rows:
+            contact_id = (row.get('Contact_ID') or '').strip()
+            date = (row.get('Date') or '').strip()
+            if not contact_id:
+                continue  # rows without a Contact_ID are never audited
+            key = (contact_id, date, note_hash(row.get('Note') or ''))
+
+            row_date = parse_date(date)
+            final = bool(row_date and self.run_cutoff and row_date < self.run_cutoff)
+            if final and not full:
+                self.skipped += 1
+                continue
+
+            if key in self.index:
+                if not full:
+                    self.skipped += 1
+                    continue
+            else:
+                if not final:
+                    self.new_records += 1
+                self.index.add(key)
+                self.changed.append(key)
+            if row_date and (self.watermark is None or row_date > self.watermark):
+                self.watermark = row_date
+            selected.append(row)
+        return selected
+
+    def checkpoint(self):
+        """
+        Appends the entries selected since the last write and saves the state;
+        cheap enough to call after every micro-batch. Call only after the
+        batch's outputs are written.
+        """
+        if self.changed:
+            new_file = not os.path.exists(self.index_file)
+            with open(self.index_file, mode='a', encoding='utf-8', newline='') as f:
+                writer = csv.writer(f)
+                if new_file:
+                    writer.writerow(['Contact_ID', 'Date', 'Note_Hash'])
+                writer.writerows(self.changed)
+            self.changed = []
+        self._save_state()
+
+    def rollback(self):
+        """Forgets the rows selected since the last checkpoint (their outputs were not written)."""
+        self.index.difference_update(self.changed)
+        self.changed = []
+        self.new_records = 0
+        self.watermark = parse_date(self.state['watermark'] or '')
+
+    def save(self):
+        """Persists the index and state; call only after the run's outputs are written."""
+        cutoff = self.cutoff
+        tmp_index = self.index_file + '.tmp'
+        with open(tmp_index, mode='w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['Contact_ID', 'Date', 'Note_Hash'])
+            for contact_id, date, fingerprint in self.index:
+                row_date = parse_date(date)
+                if cutoff and row_date and row_date < cutoff:
+                    continue
+                writer.writerow([contact_id, date, fingerprint])
+        os.replace(tmp_index, self.index_file)
+        self.changed = []
+        self.run_cutoff = cutoff
+        self._save_state()
+
+    def _save_state(self):
+        self.state['total_scanned'] = self.total_scanned
+        self.state['watermark'] = self.watermark.strftime(DATE_FORMAT) if self.watermark else None
+        self.state['last_run'] = datetime.now().isoformat(timespec='seconds')
+        self.new_records = 0
+        with open(self.state_file, mode='w', encoding='utf-8') as f:
+            json.dump(self.state, f, indent=2)
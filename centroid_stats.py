@@ -0,0 +1,151 @@
+import os
+import numpy as np
+
+# --- Configuration ---
+MODEL_FILE = "intent_centroids.npz"
+Z_THRESHOLD = 2.0          # flag utterances more than this many std below their intent's mean similarity
+MIN_STATS_COUNT = 10       # below this many scored utterances an intent falls back to the fixed threshold
+MIN_CENTROID_COUNT = 2     # an intent needs at least this many utterances to be scored
+
+
+class CentroidModel:
+    """
+    Persisted per-intent running statistics for outlier scoring:
+    vector sums and counts (the centroid is sum / |sum| for normalized
+    embeddings) plus count / mean / M2 of the similarity scores (Welford),
+    so new utterances are scored and folded in without re-encoding the corpus.
+    """
+
+    def __init__(self, dim, model_name=""):
+        self.dim = dim
+        self.model_name = model_name
+        self.intents = []
+        self.index = {}
+        self.sums = np.zeros((0, dim), dtype=np.float64)
+        self.counts = np.zeros(0, dtype=np.int64)
+        self.sim_n = np.zeros(0, dtype=np.int64)
+        self.sim_mean = np.zeros(0, dtype=np.float64)
+        self.sim_m2 = np.zeros(0, dtype=np.float64)
+
+    # --- Intent rows ---
+    def _rows(self, intents, add=False):
+        """Row number of each intent (-1 for unknown / empty ones unless add=True)."""
+        if add:
+            self._add_intents(intents)
+        rows = np.full(len(intents), -1, dtype=np.int64)
+        for i, intent in enumerate(intents):
+            if isinstance(intent, str) and intent:
+                rows[i] = self.index.get(intent, -1)
+        return rows
+
+    def _add_intents(self, intents):
+        """Registers the batch's new intents and grows the arrays once."""
+        new = [i for i in dict.fromkeys(intents) if isinstance(i, str) and i and i not in self.index]
+        if not new:
+            return
+        for intent in new:
+            self.index[intent] = len(self.intents)
+            self.intents.append(intent)
+        self.sums = np.concatenate([self.sums, np.zeros((len(new), self.dim))])
+        for name in ("counts", "sim_n", "sim_mean", "sim_m2"):
+            old = getattr(self, name)
+            setattr(self, name, np.concatenate([old, np.zeros(len(new), dtype=old.dtype)]))
+
+    # --- Centroids ---
+    def add_vectors(self, embeddings, intents):
+        """Adds normalized embeddings to their intents' running sums."""
+        rows = self._rows(intents, add=True)
+        valid = rows >= 0
+        np.add.at(self.sums, rows[valid], embeddings[valid])
+        self.counts += np.bincount(rows[valid], minlength=len(self.intents))
+
+    def similarity(self, embeddings, intents):
+        """Cosine similarity of each embedding to its intent centroid (NaN if not scorable)."""
+        rows = self._rows(intents)
+        scored = rows >= 0
+        scored[scored] = self.counts[rows[scored]] >= MIN_CENTROID_COUNT
+
+        sims = np.full(len(rows), np.nan, dtype=np.float64)
+        if scored.any():
+            centroids = self.sums[rows[scored]]
+            norms = np.linalg.norm(centroids, axis=1)
+            sims[scored] = np.einsum("ij,ij->i", embeddings[scored], centroids) / np.where(norms == 0, 1, norms)
+        return sims
+
+    # --- Similarity statistics ---
+    def add_similarities(self, sims, intents):
+        """Merges a batch of similarity scores into each intent's mean/variance (Chan et al.)."""
+        rows = self._rows(intents)
+        valid = (rows >= 0) & ~np.isnan(sims)
+        if not valid.any():
+            return
+        rows, sims = rows[valid], sims[valid]
+        k = len(self.intents)
+
+        n_b = np.bincount(rows, minlength=k)
+        sum_b = np.bincount(rows, weights=sims, minlength=k)
+        has = n_b > 0
+        mean_b = np.zeros(k)
+        mean_b[has] = sum_b[has] / n_b[has]
+        m2_b = np.bincount(rows, weights=(sims - mean_b[rows]) ** 2, minlength=k)
+
+        n_a = self.sim_n
+        n = n_a + n_b
+        delta = mean_b - self.sim_mean
+        safe_n = np.where(n == 0, 1, n)
+        self.sim_mean = np.where(has, self.sim_mean + delta * n_b / safe_n, self.sim_mean)
+        self.sim_m2 = np.where(has, self.sim_m2 + m2_b + delta ** 2 * n_a * n_b / safe_n, self.sim_m2)
+        self.sim_n = n
+
+    def zscores(self, sims, intents):
+        """How many standard deviations each score lies from its intent's mean (NaN if unknown)."""
+        rows = self._rows(intents)
+        z = np.full(len(rows), np.nan, dtype=np.float64)
+        known = (rows >= 0) & ~np.isnan(sims)
+        r = rows[known]
+        std = np.sqrt(self.sim_m2[r] / np.maximum(self.sim_n[r] - 1, 1))
+        z[known] = (sims[known] - self.sim_mean[r]) / np.where(std == 0, np.inf, std)
+        return z
+
+    def is_outlier(self, sims, intents, fallback_threshold):
+        """
+        Adaptive per-intent flag: z-score below -Z_THRESHOLD once an intent has
+        MIN_STATS_COUNT scores, otherwise the fixed fallback threshold.
+        """
+        rows = self._rows(intents)
+        z = self.zscores(sims, intents)
+        enough = np.zeros(len(rows), dtype=bool)
+        enough[rows >= 0] = self.sim_n[rows[rows >= 0]] >= MIN_STATS_COUNT
+        with np.errstate(invalid="ignore"):
+            adaptive = enough & (z < -Z_THRESHOLD)
+            fixed = ~enough & (sims < fallback_threshold)
+        return adaptive | fixed
+
+    # --- Persistence ---
+    def save(self, path=MODEL_FILE):
+        tmp_path = path + ".tmp.npz"
+        np.savez(
+            tmp_path,
+            model_name=np.array(self.model_name),
+            intents=np.array(self.intents, dtype=str),
+            sums=self.sums, counts=self.counts,
+            sim_n=self.sim_n, sim_mean=self.sim_mean, sim_m2=self.sim_m2,
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path=MODEL_FILE, model_name=None):
+        """Loads a saved model; with model_name, refuses one built by a different embedding model."""
+        data = np.load(path)
+        saved_name = str(data["model_name"])
+        if model_name is not None and saved_name != model_name:
+            raise ValueError(f"{path} was built with '{saved_name}', not '{model_name}'; rebuild it with a full run.")
+        model = cls(dim=data["sums"].shape[1], model_name=saved_name)
+        model.intents = [str(i) for i in data["intents"]]
+        model.index = {intent: row for row, intent in enumerate(model.intents)}
+        model.sums = data["sums"]
+        model.counts = data["counts"]
+        model.sim_n = data["sim_n"]
+        model.sim_mean = data["sim_mean"]
+        model.sim_m2 = data["sim_m2"]
+        return model
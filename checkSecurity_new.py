@@ -3,25 +3,25 @@ import re
 import os
 import pandas as pd
 from datetime import datetime
-from presidio_analyzer import AnalyzerEngine, RecognizerRegistry, PatternRecognizer, Pattern
+from audit_ingest import read_batches, read_header, report_fieldnames, to_source_row
+from presidio_analyzer import AnalyzerEngine, RecognizerRegistry
+from password_recognizer import KeywordPasswordRecognizer
+from rule_timing import RuleTimer, MAX_PRESIDIO_CHARS, DIAGNOSTICS_FILE
 from presidio_anonymizer import AnonymizerEngine
 from presidio_anonymizer.entities import OperatorConfig
 
 # --- Configuration ---
 INPUT_FILE = 'report.csv'
+INPUT_PROFILE = 'report'   # schema profile in audit_ingest.SCHEMA_PROFILES
 OUTPUT_FILE = 'ng_report.csv'
 MASTER_DATA = 'past_errors.csv'
 EXCEL_REPORT = 'Weekly_Security_Report.xlsx'
+PROFILE_RULES = False   # print per-rule timing and hit counts at the end
 
 # --- 1. Presidio Setup (AI & Anonymization Layer) ---
-# Define custom pattern for passwords
-password_pattern = Pattern(name="password_pattern", regex=r"\b\S{4,}\b", score=0.5)
-
-password_recognizer = PatternRecognizer(
-    supported_entity="PASSWORD",
-    patterns=[password_pattern],
-    context=["password", "pw", "passcode", "secret code"]
-)
+# Keyword-anchored: candidates only right after password/passcode/pw/"secret code"
+# and the phrase templates, instead of every 4+ character word in the note
+password_recognizer = KeywordPasswordRecognizer()
 
 # Initialize Analyzer Engine
 registry = RecognizerRegistry()
@@ -32,6 +32,9 @@ analyzer = AnalyzerEngine(registry=registry)
 # Initialize Anonymizer Engine
 anonymizer = AnonymizerEngine()
 
+# Per-rule timing and per-note time budgets
+rule_timer = RuleTimer(enabled=PROFILE_RULES)
+
 # --- 2. Profanity List ---
 PROFANITY_LIST = [
     'Jesus Christ', 'God damn', 'Damn it', 'Hell', 'Holy cow',
@@ -100,33 +103,41 @@ def check_logic(row):
         errors.append(f"Empty Note (Skill: {skill})")
 
     # Check 2: Security Scans (Only if Note is not empty)
+    presidio_results = []
     if note:
-        # AI Scan for Passwords
-        presidio_results = analyzer.analyze(text=note, entities=["PASSWORD"], language='en')
-        
+        rule_timer.start_note()
+
+        # AI Scan for Passwords (at most MAX_PRESIDIO_CHARS characters, timed as one stage)
+        with rule_timer.stage("Presidio PASSWORD") as result:
+            presidio_results = analyzer.analyze(text=note[:MAX_PRESIDIO_CHARS], entities=["PASSWORD"], language='en')
+            result['hit'] = any(res.score >= 0.6 for res in presidio_results)
+
         # Identify if any AI detection meets the score threshold
-        if any(res.score >= 0.6 for res in presidio_results):
+        if result['hit']:
             errors.append("Password (AI)")
 
         # Regex Safety Net & PII Patterns
-        if re.search(r'(password|passcode|pw|secret code).{0,15}[:=]\s?\S+', note, re.IGNORECASE):
+        if rule_timer.search("Password (Regex)", r'(password|passcode|pw|secret code).{0,15}[:=]\s?\S+', note, re.IGNORECASE):
             if "Password (AI)" not in errors:
                 errors.append("Password (Regex)")
 
-        if re.search(r'\d{4}-\d{4}-\d{4}-\d{4}', note):
+        if rule_timer.search("Credit Card Number", r'\d{4}-\d{4}-\d{4}-\d{4}', note):
             errors.append("Credit Card Number")
         
-        if re.search(r'(CVV|CVC|CID|security code).{0,10}\d{3,4}', note, re.IGNORECASE):
+        if rule_timer.search("CVV", r'(CVV|CVC|CID|security code).{0,10}\d{3,4}', note, re.IGNORECASE):
             errors.append("CVV")
             
-        if re.search(r'(Verification|Verified|PIN|Code).{0,25}\b\d{4}\b', note, re.IGNORECASE):
+        if rule_timer.search("PIN", r'(Verification|Verified|PIN|Code).{0,25}\b\d{4}\b', note, re.IGNORECASE):
             errors.append("PIN")
 
         # Profanity Scan
         for word in PROFANITY_LIST:
-            if re.search(rf'\b{word}\b', note, re.IGNORECASE):
+            if rule_timer.search(f"Profanity({word})", rf'\b{word}\b', note, re.IGNORECASE):
                 errors.append(f"Profanity({word})")
 
+        # Runaway inputs are noted in the diagnostics file instead of blocking the run
+        rule_timer.add_note_notices(current_row, truncated=len(note) > MAX_PRESIDIO_CHARS)
+
     if errors:
         # If any PII/Security issue is found, redact the Note field
         current_row['Note'] = redact_content(note, presidio_results)
@@ -207,15 +218,12 @@ def main():
     scanned_count = 0
     ng_list = []
     
-    # Process input file
-    with open(INPUT_FILE, mode='r', encoding='utf-8-sig') as f:
-        reader = csv.DictReader(f)
-        fieldnames = list(reader.fieldnames)
-        if 'Reason_for_Error' not in fieldnames:
-            fieldnames.append('Reason_for_Error')
-            
-        for row in reader:
-            scanned_count += 1
+    # Process input file (columnar batches, canonical field names)
+    fieldnames = report_fieldnames(read_header(INPUT_FILE), INPUT_PROFILE)
+
+    for batch in read_batches(INPUT_FILE, INPUT_PROFILE):
+        scanned_count += len(batch)
+        for row in batch:
             result = check_logic(row)
             if result:
                 ng_list.append(result)
@@ -225,7 +233,7 @@ def main():
         with open(OUTPUT_FILE, mode='w', encoding='utf-8-sig', newline='') as f:
             writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction='ignore')
             writer.writeheader()
-            writer.writerows(ng_list)
+            writer.writerows(to_source_row(row, INPUT_PROFILE) for row in ng_list)
         
         # Update Master Database
         new_df = pd.DataFrame(ng_list)
@@ -240,7 +248,14 @@ def main():
     else:
         print("Audit Complete. No issues detected.")
 
+    notices = rule_timer.flush_notices()
+    if notices:
+        print(f"{notices} note(s) were not scanned completely. See {DIAGNOSTICS_FILE}")
+
     create_visual_report(scanned_count)
 
+    if rule_timer.enabled:
+        rule_timer.report()
+
 if __name__ == "__main__":
     main()
@@ -1,30 +1,42 @@
 import csv
 import re
 import os
+import time
+import argparse
 import pandas as pd
 from datetime import datetime
-from presidio_analyzer import AnalyzerEngine, RecognizerRegistry, PatternRecognizer, Pattern
+from audit_watermark import ScanWatermark
+from audit_watch import CsvTailer
+from audit_ingest import read_batches, read_header, report_fieldnames, to_canonical_row, to_source_row
+from rule_timing import RuleTimer, WINDOW_CHARS, MAX_PRESIDIO_CHARS, DIAGNOSTICS_FILE
+from presidio_analyzer import AnalyzerEngine, RecognizerRegistry
+from password_recognizer import KeywordPasswordRecognizer
 
 # --- Configuration ---
 INPUT_FILE = 'report.csv'
+INPUT_PROFILE = 'report'   # schema profile in audit_ingest.SCHEMA_PROFILES
 OUTPUT_FILE = 'ng_report.csv'
 MASTER_DATA = 'past_errors.csv'
 EXCEL_REPORT = 'Weekly_Security_Report.xlsx'
+BATCH_MODE = True   # evaluate cheap rules over whole columns; only candidate rows go to Presidio
+WATCH_INTERVAL = 5         # seconds between inbox polls in --watch mode
+REPORT_INTERVAL = 300      # refresh the Excel dashboard at most this often in --watch mode
+INDEX_COMPACT_INTERVAL = 3600  # rewrite and prune the scan index at most this often in --watch mode
+PROFILE_RULES = False      # collect per-rule timing (also enabled by --profile-rules)
 
 # --- 1. Custom Presidio Setup (AI Layer) ---
-password_pattern = Pattern(name="password_pattern", regex=r"\b\S{4,}\b", score=0.5)
-
-password_recognizer = PatternRecognizer(
-    supported_entity="PASSWORD",
-    patterns=[password_pattern],
-    context=["password", "pw", "passcode", "secret code"]
-)
+# Keyword-anchored: candidates only right after password/passcode/pw/"secret code"
+# and the phrase templates, instead of every 4+ character word in the note
+password_recognizer = KeywordPasswordRecognizer()
 
 registry = RecognizerRegistry()
 registry.load_predefined_recognizers()
 registry.add_recognizer(password_recognizer)
 analyzer = AnalyzerEngine(registry=registry)
 
+# Per-rule timing and per-note time budgets
+rule_timer = RuleTimer(enabled=PROFILE_RULES)
+
 # --- 2. Profanity List ---
 PROFANITY_LIST = [
     'Jesus Christ', 'God damn', 'Damn it', 'Hell', 'Holy cow',
@@ -59,34 +71,132 @@ def check_logic(row):
 
     # Check 2: Security Scans (Only if Note is not empty)
     if note:
+        rule_timer.start_note()
+
         # AI Scan
-        presidio_results = analyzer.analyze(text=note, entities=["PASSWORD"], language='en')
-        if any(res.score >= 0.6 for res in presidio_results):
+        if analyze_password(note):
             errors.append("Password (AI)")
 
         # Regex Safety Net
         if "Password (AI)" not in errors:
-            if re.search(r'(password|passcode|pw|secret code).{0,15}[:=]\s?\S+', note, re.IGNORECASE):
+            if rule_timer.search("Password (Regex)", r'(password|passcode|pw|secret code).{0,15}[:=]\s?\S+', note, re.IGNORECASE):
                 errors.append("Password (Regex)")
 
         # PII Patterns
-        if re.search(r'\d{4}-\d{4}-\d{4}-\d{4}', note):
+        if rule_timer.search("Credit Card Number", r'\d{4}-\d{4}-\d{4}-\d{4}', note):
             errors.append("Credit Card Number")
-        if re.search(r'(CVV|CVC|CID|security code).{0,10}\d{3,4}', note, re.IGNORECASE):
+        if rule_timer.search("CVV", r'(CVV|CVC|CID|security code).{0,10}\d{3,4}', note, re.IGNORECASE):
             errors.append("CVV")
-        if re.search(r'(Verification|Verified|PIN|Code).{0,25}\b\d{4}\b', note, re.IGNORECASE):
+        if rule_timer.search("PIN", r'(Verification|Verified|PIN|Code).{0,25}\b\d{4}\b', note, re.IGNORECASE):
             errors.append("PIN")
 
         # Profanity Scan
         for word in PROFANITY_LIST:
-            if re.search(rf'\b{word}\b', note, re.IGNORECASE):
+            if rule_timer.search(f"Profanity({word})", rf'\b{word}\b', note, re.IGNORECASE):
                 errors.append(f"Profanity({word})")
 
+        # Runaway inputs are noted in the diagnostics file instead of blocking the run
+        rule_timer.add_note_notices(current_row, truncated=len(note) > MAX_PRESIDIO_CHARS)
+
     if errors:
         current_row['Reason_for_Error'] = " / ".join(errors)
         return current_row
     return None
 
+def analyze_password(note):
+    """Presidio PASSWORD scan on at most MAX_PRESIDIO_CHARS characters, timed as one stage."""
+    with rule_timer.stage("Presidio PASSWORD") as result:
+        presidio_results = analyzer.analyze(text=note[:MAX_PRESIDIO_CHARS], entities=["PASSWORD"], language='en')
+        result['hit'] = any(res.score >= 0.6 for res in presidio_results)
+    return result['hit']
+
+def check_batch(rows):
+    """
+    Column-wise version of check_logic for a batch of rows.
+    Deterministic rules run as vectorized string operations and build one
+    boolean mask per reason; Presidio only sees notes matching one of the
+    recognizer's keywords or phrase templates (without one it finds nothing).
+    Notes longer than one scan window go through check_logic so the per-note
+    time budgets still apply to them.
+    Returns the NG rows, same content and order as calling check_logic per row.
+    """
+    if not rows:
+        return []
+
+    df = pd.DataFrame.from_records(rows, columns=['Contact_ID', 'Agent_Time', 'Skill', 'Note'])
+    df = df.fillna('').astype(str).apply(lambda col: col.str.strip())
+
+    has_id = df['Contact_ID'] != ''
+    note = df['Note']
+    long_note = has_id & (note.str.len() > WINDOW_CHARS)
+    has_note = has_id & (note != '') & ~long_note
+
+    is_int = df['Agent_Time'].str.fullmatch(r'[+-]?\d+')
+    agent_time = pd.to_numeric(df['Agent_Time'].where(is_int, '0'), errors='coerce').fillna(0)
+
+    def column_rule(rule, pattern, case=False, notes=note):
+        """One vectorized rule over the batch, timed as a single call."""
+        with rule_timer.stage(rule) as result:
+            mask = notes.str.contains(pattern, case=case, regex=True)
+            result['hit'] = int(mask.sum())
+        return mask
+
+    # (reason, mask) in the same order check_logic appends them
+    checks = []
+
+    # Check 1: Empty Notes with Handle Time
+    empty_note = has_id & (note == '') & (agent_time > 0)
+    checks.append((None, empty_note))
+
+    # Check 2: Security Scans (Only if Note is not empty)
+    # AI Scan on candidate rows only
+    ai_candidates = has_note & column_rule("Presidio candidates", password_recognizer.candidate_regex)
+    ai_hit = pd.Series(False, index=df.index)
+    for i in df.index[ai_candidates]:
+        ai_hit[i] = analyze_password(note[i])
+    checks.append(("Password (AI)", ai_hit))
+
+    # Regex Safety Net
+    pw_regex = column_rule("Password (Regex)", r'(?:password|passcode|pw|secret code).{0,15}[:=]\s?\S+')
+    checks.append(("Password (Regex)", has_note & ~ai_hit & pw_regex))
+
+    # PII Patterns
+    checks.append(("Credit Card Number", has_note & column_rule("Credit Card Number", r'\d{4}-\d{4}-\d{4}-\d{4}', case=True)))
+    checks.append(("CVV", has_note & column_rule("CVV", r'(?:CVV|CVC|CID|security code).{0,10}\d{3,4}')))
+    checks.append(("PIN", has_note & column_rule("PIN", r'(?:Verification|Verified|PIN|Code).{0,25}\b\d{4}\b')))
+
+    # Profanity Scan: one combined pass, then per-word only on the rows that hit
+    profanity_regex = '|'.join(rf'\b{word}\b' for word in PROFANITY_LIST)
+    prof_rows = has_note & column_rule("Profanity (combined)", profanity_regex)
+    prof_notes = note[prof_rows]
+    for word in PROFANITY_LIST:
+        hit = pd.Series(False, index=df.index)
+        hit[prof_notes.index] = column_rule(f"Profanity({word})", rf'\b{word}\b', notes=prof_notes)
+        checks.append((f"Profanity({word})", hit))
+
+    flagged = pd.Series(False, index=df.index)
+    for _, mask in checks:
+        flagged |= mask
+
+    # Join reasons only for flagged rows
+    checks = [(reason, mask.to_numpy()) for reason, mask in checks]
+    long_note = long_note.to_numpy()
+    ng_rows = []
+    for i in df.index[flagged | long_note]:
+        if long_note[i]:
+            result = check_logic(rows[i])
+            if result:
+                ng_rows.append(result)
+            continue
+        errors = []
+        for reason, mask in checks:
+            if mask[i]:
+                errors.append(reason if reason else f"Empty Note (Skill: {df['Skill'][i]})")
+        current_row = rows[i].copy()
+        current_row['Reason_for_Error'] = " / ".join(errors)
+        ng_rows.append(current_row)
+    return ng_rows
+
 def get_week_of_month(dt):
     """Helper to calculate week number within the month."""
     first_day = dt.replace(day=1)
@@ -153,45 +263,166 @@ def create_visual_report(total_scanned):
         
         dashboard.insert_chart('B7', bar_chart)
 
+def scan_rows(rows):
+    """Runs the configured evaluation mode over a list of canonical rows."""
+    if BATCH_MODE:
+        return check_batch(rows)
+    return [result for result in map(check_logic, rows) if result]
+
+def scan_rows_isolated(rows):
+    """
+    scan_rows for --watch mode: if the batch raises, its rows are checked one by
+    one and a note that still fails is reported in the diagnostics file instead
+    of stopping the daemon.
+    """
+    try:
+        return scan_rows(rows)
+    except Exception:
+        pass
+    ng_list = []
+    for row in rows:
+        try:
+            result = check_logic(row)
+        except Exception as e:
+            rule_timer.add_notice(row, f"Scan Failed({type(e).__name__}: {e})")
+            continue
+        if result:
+            ng_list.append(result)
+    return ng_list
+
+def append_csv(path, rows, fieldnames):
+    """Appends rows to a CSV, writing the header when the file is new."""
+    is_new = not os.path.exists(path) or os.path.getsize(path) == 0
+    if not is_new:
+        # Keep the column order of the existing file
+        with open(path, mode='r', encoding='utf-8-sig', newline='') as f:
+            fieldnames = next(csv.reader(f), fieldnames)
+    with open(path, mode='a', encoding='utf-8-sig' if is_new else 'utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction='ignore')
+        if is_new:
+            writer.writeheader()
+        writer.writerows(rows)
+
+def watch(inbox, full=False):
+    """
+    Long-running mode: polls the inbox for new or growing CSV files and audits
+    new records in micro-batches. NG rows are appended to OUTPUT_FILE and
+    MASTER_DATA within one poll interval; file offsets and new scan-index
+    entries are checkpointed after each batch so a restart resumes without
+    reprocessing, and the index is compacted every INDEX_COMPACT_INTERVAL.
+    """
+    tailer = CsvTailer()
+    watermark = ScanWatermark()
+    master_fieldnames = ['Contact_ID', 'Date', 'Agent_Time', 'Skill', 'Note', 'Reason_for_Error']
+    last_report = 0
+    last_compact = time.time()
+
+    print(f"Watching {inbox} (every {WATCH_INTERVAL}s). Press Ctrl+C to stop.")
+    try:
+        while True:
+            found_ng = False
+            for path, raw_rows in tailer.poll(inbox):
+                try:
+                    rows = [to_canonical_row(row, INPUT_PROFILE) for row in raw_rows]
+                    rows = watermark.select(rows, full=full)
+                    ng_list = scan_rows_isolated(rows)
+
+                    if ng_list:
+                        fieldnames = report_fieldnames(tailer.header(path), INPUT_PROFILE)
+                        append_csv(OUTPUT_FILE, [to_source_row(row, INPUT_PROFILE) for row in ng_list], fieldnames)
+                        append_csv(MASTER_DATA, ng_list, master_fieldnames)
+                        found_ng = True
+
+                    rule_timer.flush_notices()
+
+                    # Outputs first, then checkpoints: a crash in between only re-reads the batch
+                    watermark.checkpoint()
+                    tailer.commit()
+                except Exception as e:
+                    # e.g. an output file locked by Excel: the batch is read again on the next poll
+                    watermark.rollback()
+                    tailer.rollback()
+                    rule_timer.discard_notices()
+                    print(f"{os.path.basename(path)}: batch failed, retrying next poll: {type(e).__name__}: {e}")
+                    continue
+                print(f"{os.path.basename(path)}: Scanned: {len(rows)}, NG Found: {len(ng_list)}")
+
+            # Compact the scan index (drop entries past the lookback) between polls
+            if time.time() - last_compact >= INDEX_COMPACT_INTERVAL:
+                watermark.save()
+                last_compact = time.time()
+
+            if found_ng and time.time() - last_report >= REPORT_INTERVAL:
+                create_visual_report(watermark.total_scanned)
+                last_report = time.time()
+
+            time.sleep(WATCH_INTERVAL)
+    except KeyboardInterrupt:
+        create_visual_report(watermark.total_scanned)
+        if rule_timer.enabled:
+            rule_timer.report()
+        print("Watch stopped.")
+
 def main():
+    parser = argparse.ArgumentParser(description="Security audit of contact notes.")
+    parser.add_argument('--full', action='store_true',
+                        help="rescan every record, e.g. after a rule change")
+    parser.add_argument('--profile-rules', action='store_true',
+                        help="print per-rule timing and hit counts at the end")
+    parser.add_argument('--watch', metavar='INBOX',
+                        help="keep running and audit CSV files arriving in this directory")
+    args = parser.parse_args()
+    if args.profile_rules:
+        rule_timer.enabled = True
+
+    if args.watch:
+        watch(args.watch, full=args.full)
+        return
+
     if not os.path.exists(INPUT_FILE):
         print(f"Error: {INPUT_FILE} not found.")
         return
 
+    # Only new or changed records (Contact_ID, Date, note hash) are scanned
+    watermark = ScanWatermark()
     scanned_count = 0
     ng_list = []
     
-    with open(INPUT_FILE, mode='r', encoding='utf-8-sig') as f:
-        reader = csv.DictReader(f)
-        fieldnames = list(reader.fieldnames)
-        if 'Reason_for_Error' not in fieldnames:
-            fieldnames.append('Reason_for_Error')
-            
-        for row in reader:
-            scanned_count += 1
-            result = check_logic(row)
-            if result:
-                ng_list.append(result)
+    fieldnames = report_fieldnames(read_header(INPUT_FILE), INPUT_PROFILE)
+
+    for batch in read_batches(INPUT_FILE, INPUT_PROFILE):
+        batch = watermark.select(batch, full=args.full)
+        scanned_count += len(batch)
+        ng_list.extend(scan_rows(batch))
 
     if ng_list:
         with open(OUTPUT_FILE, mode='w', encoding='utf-8-sig', newline='') as f:
             writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction='ignore')
             writer.writeheader()
-            writer.writerows(ng_list)
+            writer.writerows(to_source_row(row, INPUT_PROFILE) for row in ng_list)
         
         new_df = pd.DataFrame(ng_list)
         if os.path.exists(MASTER_DATA):
-            old_df = pd.read_csv(MASTER_DATA)
+            old_df = pd.read_csv(MASTER_DATA, dtype=str)
             combined_df = pd.concat([old_df, new_df], ignore_index=True).drop_duplicates()
         else:
             combined_df = new_df
         
         combined_df.to_csv(MASTER_DATA, index=False, encoding='utf-8-sig')
-        print(f"Audit Complete. Scanned: {scanned_count}, NG Found: {len(ng_list)}")
+        print(f"Audit Complete. Scanned: {scanned_count} (skipped unchanged: {watermark.skipped}), NG Found: {len(ng_list)}")
     else:
-        print("Audit Complete. No issues detected.")
+        print(f"Audit Complete. Scanned: {scanned_count} (skipped unchanged: {watermark.skipped}). No issues detected.")
+
+    notices = rule_timer.flush_notices()
+    if notices:
+        print(f"{notices} note(s) were not scanned completely. See {DIAGNOSTICS_FILE}")
+
+    # Outputs are written; now the scanned records can be marked as done
+    watermark.save()
+    create_visual_report(watermark.total_scanned)
 
-    create_visual_report(scanned_count)
+    if rule_timer.enabled:
+        rule_timer.report()
 
 if __name__ == "__main__":
     main()
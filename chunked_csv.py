@@ -0,0 +1,70 @@
+import os
+import pandas as pd
+
+# --- Configuration ---
+CHUNK_SIZE = 100_000     # rows per chunk; memory use scales with this, not with file size
+
+
+def read_header(path, encoding="utf-8-sig"):
+    """Returns the column names of a CSV without reading any rows."""
+    return list(pd.read_csv(path, nrows=0, encoding=encoding).columns)
+
+
+def read_chunks(path, usecols=None, dtype=str, chunksize=CHUNK_SIZE, encoding="utf-8-sig"):
+    """
+    Streams a CSV as DataFrames of at most chunksize rows.
+    usecols may hold column names or positions (e.g. [2, 3] for C/D);
+    dtype defaults to str so pandas never has to infer types per chunk.
+    """
+    if usecols is not None and all(isinstance(c, int) for c in usecols):
+        header = read_header(path, encoding)
+        usecols = [header[c] for c in usecols]
+
+    yield from pd.read_csv(
+        path,
+        usecols=usecols,
+        dtype=dtype,
+        chunksize=chunksize,
+        encoding=encoding,
+        keep_default_na=False,
+        na_values=[""],
+    )
+
+
+class ChunkWriter:
+    """
+    Appends DataFrame chunks to one CSV: the file is truncated on open,
+    the header is written with the first chunk and later chunks are appended.
+    Pass columns to keep the layout fixed when chunks carry different keys.
+    """
+
+    def __init__(self, path, columns=None, encoding="utf-8-sig"):
+        self.path = path
+        self.columns = columns
+        self.encoding = encoding
+        self.rows_written = 0
+        self._started = False
+
+    def __enter__(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def write(self, chunk):
+        if self.columns is not None:
+            chunk = chunk.reindex(columns=self.columns)
+        if chunk.empty and self._started:
+            return
+        chunk.to_csv(
+            self.path,
+            mode="a" if self._started else "w",
+            header=not self._started,
+            index=False,
+            # Only the first write may emit a BOM
+            encoding=self.encoding if not self._started else self.encoding.replace("-sig", ""),
+        )
+        self._started = True
+        self.rows_written += len(chunk)
@@ -1,16 +1,152 @@
-import win32com.client
+import os
+import csv
+import sys
+import glob
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import xlsxwriter
 
-excel = win32com.client.Dispatch("Excel.Application")
-excel.Visible = False
+# --- Configuration ---
+SAMPLE_ROWS = 1000           # rows used to infer column types
+MAX_SHEET_ROWS = 1048576     # Excel row limit per sheet (header included)
+MAX_WORKERS = os.cpu_count() or 1
 
-wb = excel.Workbooks.Open(r"C:\path\data.csv")
 
-xlsx_path = r"C:\path\data.xlsx"
+def infer_column_types(sample_rows, num_columns):
+    """Decides once per column whether values are int, float or text."""
+    types = []
+    for col in range(num_columns):
+        col_type = "int"
+        for row in sample_rows:
+            value = row[col].strip() if col < len(row) else ""
+            if not value:
+                continue
+            if col_type == "int":
+                try:
+                    int(value)
+                    continue
+                except ValueError:
+                    col_type = "float"
+            try:
+                float(value)
+            except ValueError:
+                col_type = "text"
+                break
+        types.append(col_type)
+    return types
 
-# 51 = xlsx
-wb.SaveAs(xlsx_path, FileFormat=51)
 
-wb.Close(False)
-excel.Quit()
+def convert_value(value, col_type):
+    """Converts one cell using its column type; anything unparseable stays text."""
+    if col_type == "text" or not value:
+        return value
+    try:
+        return int(value) if col_type == "int" else float(value)
+    except ValueError:
+        return value
 
-print("done")
+
+def convert_file(csv_path, xlsx_path=None):
+    """
+    Streams one CSV into an XLSX in constant-memory mode.
+    Rows beyond the Excel limit continue on Sheet2, Sheet3, ... with the header repeated.
+    """
+    if xlsx_path is None:
+        xlsx_path = os.path.splitext(csv_path)[0] + ".xlsx"
+
+    # CSV text is data: never turn it into formulas or hyperlinks (Excel allows only
+    # 65,530 URLs per sheet; xlsxwriter drops the cells past that limit)
+    workbook = xlsxwriter.Workbook(xlsx_path, {
+        "constant_memory": True,
+        "nan_inf_to_errors": True,
+        "strings_to_formulas": False,
+        "strings_to_urls": False,
+    })
+    header_fmt = workbook.add_format({"bold": True})
+
+    total_rows = 0
+    sheets = 0
+    with open(csv_path, mode="r", encoding="utf-8-sig", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+
+        # Infer types once from a sample, then replay the sample before the rest
+        sample = []
+        for row in reader:
+            sample.append(row)
+            if len(sample) >= SAMPLE_ROWS:
+                break
+        col_types = infer_column_types(sample, len(header))
+
+        def rows():
+            yield from sample
+            yield from reader
+
+        worksheet = None
+        row_idx = MAX_SHEET_ROWS
+        for row in rows():
+            if row_idx >= MAX_SHEET_ROWS:
+                sheets += 1
+                worksheet = workbook.add_worksheet(f"Sheet{sheets}")
+                worksheet.write_row(0, 0, header, header_fmt)
+                row_idx = 1
+            for col, value in enumerate(row):
+                col_type = col_types[col] if col < len(col_types) else "text"
+                value = convert_value(value, col_type)
+                if isinstance(value, str):
+                    if value:
+                        worksheet.write_string(row_idx, col, value)
+                else:
+                    worksheet.write_number(row_idx, col, value)
+            row_idx += 1
+            total_rows += 1
+
+        if worksheet is None:
+            worksheet = workbook.add_worksheet("Sheet1")
+            worksheet.write_row(0, 0, header, header_fmt)
+            sheets = 1
+
+    workbook.close()
+    return xlsx_path, total_rows, sheets
+
+
+def expand_inputs(patterns):
+    """Expands globs and keeps the given order, dropping duplicates."""
+    paths = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern)) or [pattern]
+        for path in matches:
+            if path not in paths:
+                paths.append(path)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert CSV files to XLSX (no Excel required).")
+    parser.add_argument("inputs", nargs="+", help="CSV files or glob patterns, e.g. 'reports/*.csv'")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS, help="parallel worker processes")
+    args = parser.parse_args()
+
+    paths = expand_inputs(args.inputs)
+    missing = [p for p in paths if not os.path.exists(p)]
+    for path in missing:
+        print(f"Error: {path} not found.")
+    paths = [p for p in paths if p not in missing]
+
+    failed = len(missing)
+    with ProcessPoolExecutor(max_workers=max(1, min(args.workers, len(paths) or 1))) as pool:
+        futures = {pool.submit(convert_file, path): path for path in paths}
+        for future in as_completed(futures):
+            try:
+                xlsx_path, total_rows, sheets = future.result()
+                print(f"{futures[future]} -> {xlsx_path} ({total_rows} rows, {sheets} sheet(s))")
+            except Exception as e:
+                failed += 1
+                print(f"Failed to convert {futures[future]}: {e}")
+
+    print("done")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
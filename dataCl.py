@@ -1,11 +1,19 @@
-import pandas as pd
 import re
 import spacy
+from collections import deque
+from chunked_csv import read_chunks, ChunkWriter
+
+# 設定
+N_PROCESS = 4        # nlp.pipe のプロセス数
+BATCH_SIZE = 1000    # nlp.pipe のバッチサイズ
+CHUNK_SIZE = 100000  # 1回に読み込む行数（メモリ使用量はファイルサイズではなくこの値で決まる）
 
 # 英語モデルのロード（初回のみ: python -m spacy download en_core_web_sm）
-nlp = spacy.load("en_core_web_sm")
+# lemma_ だけを使うので、原形化に不要な parser / ner は読み込まない
+# （lemmatizer は tagger / attribute_ruler の品詞情報を使うため残す）
+nlp = spacy.load("en_core_web_sm", exclude=["parser", "ner"])
 
-def clean_utterance(text):
+def normalize_text(text):
     if not isinstance(text, str):
         return ""
     
@@ -13,23 +21,73 @@ def clean_utterance(text):
     text = text.lower()
     
     # 2. 正規表現：記号と数字を削除（a-zとスペースだけ残す）
-    text = re.sub(r'[^a-z\s]', '', text)
-    
-    # 3. spaCyで解析（動詞の原形化・単数形化）
-    doc = nlp(text)
+    return re.sub(r'[^a-z\s]', '', text)
+
+def join_lemmas(doc):
     # 助詞や代名詞を除きたい場合は if not token.is_stop を追加
     cleaned_tokens = [token.lemma_ for token in doc]
     
     # 4. 余計な空白を詰めて結合
     return " ".join(cleaned_tokens).strip()
 
-# CSVの読み込み（A列にUtteranceがある前提）
-df = pd.read_csv('your_data.csv')
-column_name = df.columns[0]  # A列を指定
+def clean_utterance(text):
+    # 3. spaCyで解析（動詞の原形化・単数形化）
+    return join_lemmas(nlp(normalize_text(text)))
+
+def clean_utterances(texts, n_process=N_PROCESS, batch_size=BATCH_SIZE):
+    """clean_utterance のバッチ版。同じ文字列は1回だけ解析して結果を割り当てる"""
+    normalized = [normalize_text(t) for t in texts]
+
+    # 重複を除いてから nlp.pipe でまとめて解析（マルチプロセス）
+    unique_texts = list(dict.fromkeys(normalized))
+    docs = nlp.pipe(unique_texts, n_process=n_process, batch_size=batch_size)
+    cleaned = {text: join_lemmas(doc) for text, doc in zip(unique_texts, docs)}
+
+    return [cleaned[t] for t in normalized]
+
+def clean_file(in_path, out_path, n_process=N_PROCESS, batch_size=BATCH_SIZE):
+    """
+    CSVをチャンクごとに読み込み、A列のクレンジング結果を追記保存する。
+    全チャンクを1本の nlp.pipe に流すのでワーカープロセスの起動・モデル読み込みは1回だけ。
+    重複除去もファイル全体で行い、同じ文字列は1回だけ解析する。
+    """
+    cleaned = {}       # 正規化済み文字列 -> 原形化結果（ファイル全体）
+    queued = set()     # nlp.pipe に渡したがまだ結果が返っていない文字列
+    pending = deque()  # [chunk, 正規化済みリスト, 未解析の件数]（入力順）
+
+    with ChunkWriter(out_path, encoding='utf-8') as writer:
+
+        def flush_ready():
+            # 先頭から、全ての文字列の結果が揃ったチャンクを書き出す
+            while pending and pending[0][2] == 0:
+                chunk, normalized, _ = pending.popleft()
+                chunk['Cleaned_Utterance'] = [cleaned[t] for t in normalized]
+                writer.write(chunk)
+
+        def new_texts():
+            for chunk in read_chunks(in_path, chunksize=CHUNK_SIZE, encoding='utf-8'):
+                column_name = chunk.columns[0]  # A列にUtteranceがある前提
+                normalized = [normalize_text(t) for t in chunk[column_name].tolist()]
+                fresh = [t for t in dict.fromkeys(normalized) if t not in cleaned and t not in queued]
+                queued.update(fresh)
+                pending.append([chunk, normalized, len(fresh)])
+                flush_ready()
+                yield from fresh
+
+        for doc in nlp.pipe(new_texts(), n_process=n_process, batch_size=batch_size):
+            # doc.text は入力文字列そのもの
+            cleaned[doc.text] = join_lemmas(doc)
+            queued.discard(doc.text)
+            # 結果は入力順に返るので、未完了の最初のチャンクの残り件数を減らす
+            for entry in pending:
+                if entry[2]:
+                    entry[2] -= 1
+                    break
+            flush_ready()
+        flush_ready()
 
-# クレンジング実行
-df['Cleaned_Utterance'] = df[column_name].apply(clean_utterance)
+    return writer.rows_written
 
-# 結果の保存
-df.to_csv('cleaned_data.csv', index=False)
-print("クレンジング完了！")
+if __name__ == "__main__":
+    clean_file('your_data.csv', 'cleaned_data.csv')
+    print("クレンジング完了！")
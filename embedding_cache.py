@@ -0,0 +1,112 @@
+import os
+import json
+import hashlib
+import numpy as np
+
+# --- Configuration ---
+CACHE_DIR = ".embedding_cache"
+ENCODE_BATCH_SIZE = 256
+
+
+def text_hash(text):
+    """Stable key for one utterance (sha1 of the UTF-8 text)."""
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    On-disk embedding store keyed by text hash and model name.
+    Vectors are appended to a raw float32 file (read back memory-mapped),
+    row order is kept in a plain-text index (one hash per line), so reruns
+    only encode new texts and each run only writes the rows it adds.
+    """
+
+    def __init__(self, model, model_name, cache_dir=CACHE_DIR, batch_size=ENCODE_BATCH_SIZE):
+        self.model = model
+        self.batch_size = batch_size
+        os.makedirs(cache_dir, exist_ok=True)
+
+        safe_name = model_name.replace("/", "__")
+        self.vectors_path = os.path.join(cache_dir, f"{safe_name}.f32")
+        self.index_path = os.path.join(cache_dir, f"{safe_name}.index")
+        self.meta_path = os.path.join(cache_dir, f"{safe_name}.meta.json")
+
+        self.dim = None
+        self.index = {}
+        self.index_lines = 0   # lines in index_path; more than len(index) after an interrupted run
+        if all(os.path.exists(p) for p in (self.vectors_path, self.index_path, self.meta_path)):
+            with open(self.meta_path, mode="r", encoding="utf-8") as f:
+                self.dim = json.load(f)["dim"]
+            # Rows past the last complete vector (interrupted append) are ignored
+            rows_on_disk = os.path.getsize(self.vectors_path) // (4 * self.dim)
+            with open(self.index_path, mode="r", encoding="utf-8") as f:
+                for row, key in enumerate(f):
+                    self.index_lines += 1
+                    key = key.strip()
+                    if row < rows_on_disk and key and len(self.index) == row:
+                        self.index[key] = row
+
+    def _load_vectors(self):
+        if not self.index:
+            return None
+        return np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(len(self.index), self.dim))
+
+    def _append(self, keys, new_vectors):
+        """Appends new rows to the vector file, then extends the index."""
+        if self.dim is None:
+            self.dim = new_vectors.shape[1]
+            with open(self.meta_path, mode="w", encoding="utf-8") as f:
+                json.dump({"dim": self.dim}, f)
+
+        old_rows = len(self.index)
+        with open(self.vectors_path, mode="ab") as f:
+            # Drop a partial tail left by an interrupted run before appending
+            f.truncate(old_rows * self.dim * 4)
+            f.write(np.ascontiguousarray(new_vectors, dtype=np.float32).tobytes())
+
+        # The index is only rewritten when it holds lines of an interrupted run
+        mode = "a" if self.index_lines == old_rows else "w"
+        with open(self.index_path, mode=mode, encoding="utf-8") as f:
+            if mode == "w":
+                f.writelines(key + "\n" for key in self.index)
+            for row, key in enumerate(keys, start=old_rows):
+                f.write(key + "\n")
+                self.index[key] = row
+        self.index_lines = len(self.index)
+
+    def encode(self, texts):
+        """
+        Returns normalized embeddings (float32, one row per input text).
+        Only texts missing from the cache are sent to the model, in a single
+        length-sorted batch run.
+        """
+        if not texts:
+            dim = self.dim or self.model.get_sentence_embedding_dimension()
+            return np.zeros((0, dim), dtype=np.float32)
+
+        keys = [text_hash(t) for t in texts]
+
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in self.index and key not in missing:
+                missing[key] = text
+
+        if missing:
+            # Sort by length so each batch pads to a similar size
+            pending = sorted(missing.items(), key=lambda kv: len(kv[1]))
+            new_vectors = self.model.encode(
+                [text for _, text in pending],
+                batch_size=self.batch_size,
+                normalize_embeddings=True,
+                convert_to_numpy=True,
+                show_progress_bar=True,
+            ).astype(np.float32)
+            self._append([key for key, _ in pending], new_vectors)
+            print(f"Encoded {len(pending)} new texts (cache size: {len(self.index)}).")
+
+        vectors = self._load_vectors()
+        rows = np.fromiter((self.index[k] for k in keys), dtype=np.int64, count=len(keys))
+        result = np.asarray(vectors[rows], dtype=np.float32)
+        # Close the mapping before the next append (Windows cannot resize a mapped file)
+        del vectors
+        return result
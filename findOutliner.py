@@ -1,66 +1,114 @@
+import argparse
 import pandas as pd
-import numpy as np
 from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
+from embedding_cache import EmbeddingCache
+from chunked_csv import read_header, read_chunks, ChunkWriter
+from centroid_stats import CentroidModel
 
 # 1. 設定
 INPUT_FILE = "input.csv"          # 元のCSVファイル名
 OUTPUT_FILE = "outliers.csv"     # 異常データの書き出し先
-THRESHOLD = 0.7                  # 類似度の閾値（低いほど「明らかにおかしいもの」に絞られます）
+THRESHOLD = 0.7                  # 統計が少ないIntent用の固定閾値（十分なデータがあるIntentはzスコアで判定）
+MODEL_NAME = 'intfloat/multilingual-e5-small'
+CACHE_DIR = ".embedding_cache"   # ベクトルのキャッシュ先（テキストのハッシュ + モデル名で管理）
+CHUNK_SIZE = 100000              # 1回に読み込む行数（メモリ使用量はファイルサイズではなくこの値で決まる）
+CENTROID_FILE = "intent_centroids.npz"  # Intentごとの合計ベクトル・件数・類似度統計（追加分の即時判定用）
 
 # 2. モデルのロード（ローカルで動作）
 print("モデルをロード中...")
-model = SentenceTransformer('intfloat/multilingual-e5-small')
+model = SentenceTransformer(MODEL_NAME)
+cache = EmbeddingCache(model, MODEL_NAME, cache_dir=CACHE_DIR)
+
+def encode_chunk(chunk, u_col):
+    """チャンク内のUtteranceを正規化済みベクトルに変換（キャッシュにないものだけエンコード）"""
+    return cache.encode(chunk[u_col].fillna("").astype(str).tolist())
+
+def get_columns(path):
+    """列名を取得（C列: Utterance, D列: Intent）"""
+    header = read_header(path)
+    return header[2], header[3]
+
+def build_model(path):
+    """全データからIntentごとの統計モデルを作り直す"""
+    u_col, i_col = get_columns(path)
+    centroids = None
+
+    # 1パス目: C/D列だけをチャンクで読み込み、Intentごとの合計ベクトルと件数を集計
+    for chunk in read_chunks(path, usecols=[u_col, i_col], chunksize=CHUNK_SIZE):
+        embeddings = encode_chunk(chunk, u_col)
+        if centroids is None:
+            centroids = CentroidModel(dim=embeddings.shape[1], model_name=MODEL_NAME)
+        centroids.add_vectors(embeddings, chunk[i_col].tolist())
+
+    # 2パス目: 中心点との類似度の平均・分散をIntentごとに集計（ベクトルはキャッシュ済み）
+    for chunk in read_chunks(path, usecols=[u_col, i_col], chunksize=CHUNK_SIZE):
+        intents = chunk[i_col].tolist()
+        sims = centroids.similarity(encode_chunk(chunk, u_col), intents)
+        centroids.add_similarities(sims, intents)
+
+    return centroids
+
+def write_outliers(path, centroids, update=False):
+    """
+    中心点との類似度を計算し、Intentごとのzスコアで乖離しているものを追記保存。
+    update=True の場合は判定後にそのデータを統計へ追加する（1件あたりO(1)）
+    """
+    u_col, i_col = get_columns(path)
+
+    with ChunkWriter(OUTPUT_FILE) as writer:
+        for chunk in read_chunks(path, chunksize=CHUNK_SIZE):
+            embeddings = encode_chunk(chunk, u_col)
+            intents = chunk[i_col].tolist()
+
+            # 判定は追加前の統計で行う
+            similarities = centroids.similarity(embeddings, intents)
+            flagged = centroids.is_outlier(similarities, intents, THRESHOLD)
+            chunk['similarity_score'] = similarities
+            chunk['z_score'] = centroids.zscores(similarities, intents)
+            writer.write(chunk[flagged])
+
+            if update:
+                centroids.add_vectors(embeddings, intents)
+                centroids.add_similarities(similarities, intents)
+
+    return writer.rows_written
 
 def main():
+    parser = argparse.ArgumentParser(description="Intentごとの不一致（外れ値）Utteranceを検出します。")
+    parser.add_argument('--incremental', metavar='NEW_FILE',
+                        help="保存済みの統計モデルで新しいデータだけを判定し、統計を更新する")
+    args = parser.parse_args()
+
     try:
-        # CSV読み込み（列番号で指定: C列=2, D列=3）
-        # header=None の場合は列番号で、ヘッダーがある場合は名前で指定できるよう調整
-        df = pd.read_csv(INPUT_FILE)
-        
-        # 列名を取得（C列とD列を特定）
-        u_col = df.columns[2]  # C列: Utterance
-        i_col = df.columns[3]  # D列: Intent
-        
-        print(f"分析開始: {u_col} (Utterance) と {i_col} (Intent) をチェックします。")
-
-        outlier_list = []
-
-        # Intentごとにグループ化して分析
-        unique_intents = df[i_col].unique()
-        
-        for intent in unique_intents:
-            subset = df[df[i_col] == intent].copy()
-            
-            # データが1つしかない場合は比較できないのでスキップ
-            if len(subset) < 2:
-                continue
-                
-            # Utteranceをベクトル化
-            embeddings = model.encode(subset[u_col].tolist())
-            
-            # そのIntent全体の平均ベクトル（中心点）を計算
-            centroid = np.mean(embeddings, axis=0).reshape(1, -1)
-            
-            # 各データの中心との類似度を計算
-            similarities = cosine_similarity(embeddings, centroid).flatten()
-            subset['similarity_score'] = similarities
-            
-            # 閾値より低い（意味が乖離している）ものを抽出
-            outliers = subset[subset['similarity_score'] < THRESHOLD]
-            outlier_list.append(outliers)
+        if args.incremental:
+            # 追加データのみ: 保存済みの統計で判定してから統計に追加
+            path = args.incremental
+            # 別モデルで作った統計では比較できないので、モデル名が違えば読み込まない
+            centroids = CentroidModel.load(CENTROID_FILE, model_name=MODEL_NAME)
+            print(f"追加分析開始: {path} を保存済みの統計（{len(centroids.intents)} Intent）で判定します。")
+            found = write_outliers(path, centroids, update=True)
+        else:
+            path = INPUT_FILE
+            u_col, i_col = get_columns(path)
+            print(f"分析開始: {u_col} (Utterance) と {i_col} (Intent) をチェックします。")
+            centroids = build_model(path)
+            if centroids is None:
+                print("データがありません。")
+                return
+            found = write_outliers(path, centroids)
 
-        # 3. 異常データの統合と保存
-        if outlier_list:
-            final_outliers = pd.concat(outlier_list)
-            
-            # 類似度が低い（おかしな可能性が高い）順に並び替え
-            final_outliers = final_outliers.sort_values(by='similarity_score')
-            
-            # 別のCSVとして書き出し
+        centroids.save(CENTROID_FILE)
+
+        # 3. 異常データの保存
+        if found:
+            # 類似度が低い（おかしな可能性が高い）順に並び替え（不一致候補のみなので小さいファイル）
+            final_outliers = pd.read_csv(OUTPUT_FILE, dtype=str, encoding='utf-8-sig')
+            final_outliers = final_outliers.sort_values(
+                by='similarity_score', key=lambda s: s.astype(float)
+            )
             final_outliers.to_csv(OUTPUT_FILE, index=False, encoding='utf-8-sig')
             
-            print(f"完了！ {len(final_outliers)} 件の不一致候補を '{OUTPUT_FILE}' に保存しました。")
+            print(f"完了！ {found} 件の不一致候補を '{OUTPUT_FILE}' に保存しました。")
         else:
             print("不一致データは見つかりませんでした。")
 
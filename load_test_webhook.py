@@ -0,0 +1,225 @@
+import os
+import sys
+import time
+import random
+import asyncio
+import argparse
+import subprocess
+import httpx
+from mock_cxone import MockCXone, start_server, DEFAULT_PORT, DEFAULT_LATENCY, DEFAULT_JITTER, DEFAULT_ERROR_RATE
+
+# --- Configuration ---
+WEBHOOK_PATH = "/webhook/summary-generated"
+APP_PORT = 8901
+DEFAULT_RATE = 20          # webhook deliveries per second
+DEFAULT_DURATION = 30      # seconds of sending
+DRAIN_TIMEOUT = 60         # seconds to wait for outstanding write-backs after sending stops
+STALL_TIMEOUT = 10         # ... but stop early once no write-back arrived for this long (e.g. token errors)
+LAG_PROBE_INTERVAL = 0.05  # seconds between event-loop lag samples (measured inside the app)
+APP_STARTUP_TIMEOUT = 120  # seconds to wait for the app (Presidio models load at import)
+MAX_CONNECTIONS = 500
+
+# ---- Synthetic summaries with PII -----
+NAMES = ["John Smith", "Maria Garcia", "Hiroshi Tanaka", "Emily Johnson", "David Brown", "Yuki Sato"]
+CARDS = ["4111 1111 1111 1111", "5500 0000 0000 0004", "3400 0000 0000 009", "6011 0000 0000 0004"]
+TEMPLATES = [
+    "Customer {name} called about a late delivery. Callback number {phone}.",
+    "{name} asked to update billing; card on file {card} was declined twice.",
+    "Agent verified {name} with phone {phone} and reset the password to {password}.",
+    "Caller {name} disputed a charge on card {card}. Follow up at {phone}.",
+    "{name} could not log in. Temporary password is {password}, customer will change it today.",
+]
+
+
+def synthetic_summary(rng):
+    text = rng.choice(TEMPLATES).format(
+        name=rng.choice(NAMES),
+        phone=f"{rng.randint(200, 999)}-{rng.randint(200, 999)}-{rng.randint(1000, 9999)}",
+        card=rng.choice(CARDS),
+        password=f"Pw{rng.randint(100000, 999999)}!",
+    )
+    # Padding so notes have realistic lengths
+    return text + " " + " ".join(rng.choice(["Issue resolved.", "No further action.", "Customer satisfied."])
+                                 for _ in range(rng.randint(0, 8)))
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p * len(values)))] if values else None
+
+
+def fmt_ms(value):
+    return f"{value * 1000:>9.1f}" if value is not None else f"{'-':>9}"
+
+
+# --- App under test ---
+def start_app(port, mock_url):
+    """
+    Runs webhookAPI with uvicorn in its own process, so the app does not share
+    a GIL with the load generator and the mock; its lag probe is switched on.
+    """
+    env = dict(os.environ, CXONE_BASE_URL=mock_url, LAG_PROBE_INTERVAL=str(LAG_PROBE_INTERVAL))
+    app_dir = os.path.dirname(os.path.abspath(__file__))
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "webhookAPI:app", "--app-dir", app_dir,
+         "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        env=env,
+    )
+    deadline = time.perf_counter() + APP_STARTUP_TIMEOUT
+    while time.perf_counter() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"webhookAPI exited with code {process.returncode} during startup")
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/webhook/stats", timeout=1)
+            return process
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f"webhookAPI did not start within {APP_STARTUP_TIMEOUT}s")
+
+
+def stop_app(process):
+    process.terminate()
+    try:
+        process.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+async def fetch_lag_samples(target):
+    """Event-loop lag samples from the app's /debug/loop-lag; None if it has no probe running."""
+    async with httpx.AsyncClient(timeout=10) as client:
+        try:
+            response = await client.get(target.rstrip("/") + "/debug/loop-lag")
+        except httpx.HTTPError:
+            return None
+    if response.status_code != 200:
+        return None
+    return response.json().get("samples") or None
+
+
+# --- Load generator ---
+async def send_one(client, url, contact_id, text, sent, responses):
+    start = time.perf_counter()
+    try:
+        response = await client.post(url, json={"contactId": contact_id, "summaryText": text})
+        status = response.json().get("status") if response.status_code == 200 else f"http {response.status_code}"
+    except httpx.HTTPError as e:
+        status = type(e).__name__
+    responses.append((status, time.perf_counter() - start))
+    if status == "received":
+        sent[contact_id] = start
+
+
+async def replay(target, rate, duration, duplicate_rate, seed):
+    """Open-loop replay: deliveries are sent on schedule whether or not earlier ones finished."""
+    rng = random.Random(seed)
+    url = target.rstrip("/") + WEBHOOK_PATH
+    sent = {}        # contact_id -> perf_counter when the webhook POST started
+    responses = []   # (status, webhook response time)
+    history = []
+    tasks = []
+    total = int(rate * duration)
+
+    limits = httpx.Limits(max_connections=MAX_CONNECTIONS, max_keepalive_connections=MAX_CONNECTIONS)
+    async with httpx.AsyncClient(limits=limits, timeout=30) as client:
+        start = time.perf_counter()
+        for i in range(total):
+            delay = start + i / rate - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if history and rng.random() < duplicate_rate:
+                contact_id, text = rng.choice(history)   # CXone-style retry of an earlier delivery
+            else:
+                contact_id, text = f"LT{seed}-{i:07d}", synthetic_summary(rng)
+                history.append((contact_id, text))
+            tasks.append(asyncio.create_task(send_one(client, url, contact_id, text, sent, responses)))
+        send_elapsed = time.perf_counter() - start
+        await asyncio.gather(*tasks)
+    return start, send_elapsed, sent, responses
+
+
+async def wait_for_writebacks(mock, sent, timeout):
+    deadline = time.perf_counter() + timeout
+    last_pending, last_progress = None, time.perf_counter()
+    while time.perf_counter() < deadline:
+        with mock.lock:
+            pending = sum(1 for contact_id in sent if contact_id not in mock.received)
+        if not pending:
+            return
+        if pending != last_pending:
+            last_pending, last_progress = pending, time.perf_counter()
+        elif time.perf_counter() - last_progress > STALL_TIMEOUT:
+            return
+        await asyncio.sleep(0.1)
+
+
+def report(args, start, send_elapsed, sent, responses, mock, lag_samples):
+    with mock.lock:
+        received = dict(mock.received)
+    end_to_end = [received[c][0] - t for c, t in sent.items() if c in received and received[c][1] == 200]
+    failed = sum(1 for c in sent if c in received and received[c][1] != 200)
+    pending = sum(1 for c in sent if c not in received)
+    last_write = max((received[c][0] for c in sent if c in received), default=start)
+
+    statuses = {}
+    for status, _ in responses:
+        statuses[status] = statuses.get(status, 0) + 1
+    ack_times = [elapsed for _, elapsed in responses]
+
+    print(f"\n=== Load test: {args.rate}/s for {args.duration}s against {args.target or 'local app (subprocess)'} ===")
+    print(f"Sent {len(responses)} deliveries in {send_elapsed:.1f}s ({len(responses) / send_elapsed:.1f}/s achieved)")
+    print("Webhook responses: " + ", ".join(f"{s}={n}" for s, n in sorted(statuses.items())))
+    print(f"Write-backs: {len(end_to_end)} ok, {failed} failed (mock errors), {pending} never written back (token error or timeout)")
+    print(f"Throughput: {len(end_to_end) / max(last_write - start, 1e-9):.1f} summaries/s redacted and written back")
+    print(f"Mock: {mock.get_stats()}")
+
+    print(f"\n{'Latency (ms)':<28} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9}")
+    rows = [("Webhook acknowledgement", ack_times), ("End-to-end (POST -> PUT)", end_to_end)]
+    if lag_samples is not None:
+        rows.append(("Event-loop lag", lag_samples))
+    for name, values in rows:
+        print(f"{name:<28} {fmt_ms(percentile(values, 0.50))} {fmt_ms(percentile(values, 0.95))} "
+              f"{fmt_ms(percentile(values, 0.99))} {fmt_ms(max(values) if values else None)}")
+
+
+async def run(args, mock):
+    target = args.target or f"http://127.0.0.1:{APP_PORT}"
+    start, send_elapsed, sent, responses = await replay(
+        target, args.rate, args.duration, args.duplicate_rate, args.seed
+    )
+    await wait_for_writebacks(mock, sent, args.drain_timeout)
+    lag_samples = await fetch_lag_samples(target)
+    return start, send_elapsed, sent, responses, lag_samples
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay synthetic PII summaries against the webhook service.")
+    parser.add_argument("--rate", type=float, default=DEFAULT_RATE, help="deliveries per second")
+    parser.add_argument("--duration", type=float, default=DEFAULT_DURATION, help="seconds of sending")
+    parser.add_argument("--duplicate-rate", type=float, default=0.0, help="share of deliveries repeating an earlier one")
+    parser.add_argument("--target", help="base URL of a running service (its CXONE_BASE_URL must point at this mock; "
+                                         "set LAG_PROBE_INTERVAL there for loop lag); default: start webhookAPI locally")
+    parser.add_argument("--mock-host", default="127.0.0.1")
+    parser.add_argument("--mock-port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--mock-latency", type=float, default=DEFAULT_LATENCY)
+    parser.add_argument("--mock-jitter", type=float, default=DEFAULT_JITTER)
+    parser.add_argument("--mock-error-rate", type=float, default=DEFAULT_ERROR_RATE)
+    parser.add_argument("--drain-timeout", type=float, default=DRAIN_TIMEOUT)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    mock = MockCXone(args.mock_latency, args.mock_jitter, args.mock_error_rate)
+    servers = [start_server(mock.app, args.mock_port, host=args.mock_host)]
+
+    app_process = None
+    try:
+        if not args.target:
+            app_process = start_app(APP_PORT, f"http://127.0.0.1:{args.mock_port}")
+        start, send_elapsed, sent, responses, lag_samples = asyncio.run(run(args, mock))
+        report(args, start, send_elapsed, sent, responses, mock, lag_samples)
+    finally:
+        if app_process is not None:
+            stop_app(app_process)
+        for server in reversed(servers):
+            server.stop()
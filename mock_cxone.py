@@ -0,0 +1,108 @@
+import time
+import random
+import asyncio
+import argparse
+import threading
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+# --- Configuration ---
+API_PREFIX = "/incontactapi/services/v28.0"   # same paths as webhookAPI.py
+DEFAULT_PORT = 8900
+DEFAULT_LATENCY = 0.05     # seconds added to every mock response
+DEFAULT_JITTER = 0.02      # + uniform random 0..jitter seconds
+DEFAULT_ERROR_RATE = 0.0   # share of requests answered with HTTP 500
+
+
+class MockCXone:
+    """
+    Local stand-in for the CXone token and interactions/summary endpoints,
+    with configurable latency and error rate. Every summary PUT is recorded
+    with its arrival time (time.perf_counter) so a load test in the same
+    process can measure end-to-end latency.
+    """
+
+    def __init__(self, latency=DEFAULT_LATENCY, jitter=DEFAULT_JITTER, error_rate=DEFAULT_ERROR_RATE):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.lock = threading.Lock()
+        self.received = {}   # contact_id -> (perf_counter at arrival, status code returned)
+        self.stats = {"token_requests": 0, "summary_puts": 0, "injected_errors": 0}
+        self.app = self._create_app()
+
+    async def _respond(self, counter, body):
+        await asyncio.sleep(self.latency + random.uniform(0, self.jitter))
+        failed = random.random() < self.error_rate
+        with self.lock:
+            self.stats[counter] += 1
+            self.stats["injected_errors"] += int(failed)
+        if failed:
+            return JSONResponse(status_code=500, content={"error": "injected failure"})
+        return JSONResponse(content=body)
+
+    def _create_app(self):
+        app = FastAPI()
+
+        @app.post(f"{API_PREFIX}/token")
+        async def token():
+            return await self._respond("token_requests", {"access_token": "mock-token", "expires_in": 3600})
+
+        @app.put(f"{API_PREFIX}/interactions/{{contact_id}}/summary")
+        async def update_summary(contact_id: str, request: Request):
+            arrived = time.perf_counter()
+            payload = await request.json()
+            response = await self._respond("summary_puts", {"contactId": contact_id, "summary": payload.get("summary")})
+            with self.lock:
+                self.received[contact_id] = (arrived, response.status_code)
+            return response
+
+        @app.get("/mock/stats")
+        async def stats():
+            return self.get_stats()
+
+        return app
+
+    def get_stats(self):
+        with self.lock:
+            return dict(self.stats)
+
+
+class ThreadedServer(uvicorn.Server):
+    """uvicorn.Server running in a background thread (e.g. next to a load generator)."""
+
+    def install_signal_handlers(self):
+        pass
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+        while not self.started:
+            if not self.thread.is_alive():
+                raise RuntimeError(f"Server on port {self.config.port} failed to start")
+            time.sleep(0.05)
+
+    def stop(self):
+        self.should_exit = True
+        self.thread.join(timeout=10)
+
+
+def start_server(app, port, host="127.0.0.1"):
+    server = ThreadedServer(uvicorn.Config(app, host=host, port=port, log_level="warning"))
+    server.start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a local mock of the CXone token and summary endpoints.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--latency", type=float, default=DEFAULT_LATENCY, help="seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=DEFAULT_JITTER, help="extra random 0..jitter seconds")
+    parser.add_argument("--error-rate", type=float, default=DEFAULT_ERROR_RATE, help="share of requests answered with 500")
+    args = parser.parse_args()
+
+    mock = MockCXone(args.latency, args.jitter, args.error_rate)
+    print(f"Mock CXone on http://{args.host}:{args.port} (set CXONE_BASE_URL to this URL)")
+    uvicorn.run(mock.app, host=args.host, port=args.port)
@@ -1,8 +1,16 @@
 import os 
-from openai import OpenAI
+from openai import OpenAI, DefaultHttpxClient
 from dotenv import load_dotenv
 import re
+import json
+import time
+import queue
+import atexit
+import hashlib
 import logging
+import logging.handlers
+import threading
+from collections import deque
 
 # Load API Key
 load_dotenv(override=True)
@@ -11,6 +19,8 @@ load_dotenv(override=True)
 LOG_FILENAME = "case_analysis.log"
 
 # Setup Logging
+# Records go through a queue; a background listener does the file/console I/O,
+# so writing the log never adds latency to an API call.
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
@@ -18,17 +28,40 @@ logger.setLevel(logging.INFO)
 file_handler = logging.FileHandler(LOG_FILENAME, mode="a", encoding="utf-8")
 file_handler.setLevel(logging.INFO)
 file_handler.setFormatter(logging.Formatter("%(levelname)s: %(message)s"))
-logger.addHandler(file_handler)
 
 # Console handler
 console_handler = logging.StreamHandler()
 console_handler.setLevel(logging.WARNING)
 console_handler.setFormatter(logging.Formatter("%(message)s"))
-logger.addHandler(console_handler)
-logging.StreamHandler()
+
+log_queue = queue.SimpleQueue()
+logger.addHandler(logging.handlers.QueueHandler(log_queue))
+log_listener = logging.handlers.QueueListener(log_queue, file_handler, console_handler, respect_handler_level=True)
+log_listener.start()
+atexit.register(log_listener.stop)
 
 # Define character limit for GPT-3.5 Turbo
 CHAR_LIMIT = 11000
+MODEL = "gpt-3.5-turbo"
+
+# Retries are left to the SDK (honors Retry-After / x-ratelimit headers on 429,
+# retries 408/409/429/5xx and connection errors); an httpx hook counts the attempts
+MAX_RETRIES = 2
+
+# Estimated price in USD per 1K tokens (prompt, completion)
+PRICING = {
+    "gpt-3.5-turbo": (0.0005, 0.0015),
+}
+
+# Number of recent calls kept for rolling aggregates
+METRICS_WINDOW = 1000
+
+class _InFlightCall:
+    """One outstanding API call that identical requests can wait on."""
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
 
 class OpenAIClient:
     def __init__(self):
@@ -36,7 +69,20 @@ class OpenAIClient:
         if not api_key:
             raise ValueError("Missing OpenAI API Key. Set OPENAI_API_KEY in environment variables.")
         
-        self.client = OpenAI(api_key=api_key)
+        self._attempts = threading.local()
+        self.client = OpenAI(
+            api_key=api_key,
+            max_retries=MAX_RETRIES,
+            http_client=DefaultHttpxClient(event_hooks={"request": [self._count_attempt]}),
+        )
+
+        # Single-flight: identical requests already in flight share one call
+        # (the client is shared by every Streamlit session in the process)
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
+        self._metrics = {"requests": 0, "api_calls": 0, "coalesced": 0, "failures": 0, "retries": 0,
+                         "prompt_tokens": 0, "completion_tokens": 0, "estimated_cost": 0.0}
+        self._recent_calls = deque(maxlen=METRICS_WINDOW)
 
     def set_prompt(self, prompt):
         if not prompt:
@@ -49,19 +95,109 @@ class OpenAIClient:
     def get_prompt(self):
         return self._prompt
 
+    def get_metrics(self):
+        """
+        Totals since start (requests, API calls, coalesced requests, failures,
+        retries, tokens, estimated cost) plus rolling aggregates over the last
+        METRICS_WINDOW API calls (latency percentiles, tokens, cost).
+        """
+        with self._inflight_lock:
+            metrics = dict(self._metrics)
+            recent = list(self._recent_calls)
+
+        latencies = sorted(call["latency"] for call in recent)
+
+        def percentile(p):
+            return latencies[min(len(latencies) - 1, int(p * len(latencies)))] if latencies else None
+
+        metrics["recent"] = {
+            "calls": len(recent),
+            "failures": sum(1 for call in recent if not call["ok"]),
+            "retries": sum(call["retries"] for call in recent),
+            "latency_avg": sum(latencies) / len(latencies) if latencies else None,
+            "latency_p50": percentile(0.50),
+            "latency_p95": percentile(0.95),
+            "latency_max": latencies[-1] if latencies else None,
+            "prompt_tokens": sum(call["prompt_tokens"] for call in recent),
+            "completion_tokens": sum(call["completion_tokens"] for call in recent),
+            "estimated_cost": sum(call["cost"] for call in recent),
+        }
+        return metrics
+
+    def _record_call(self, model, latency, retries, usage, ok):
+        prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+        completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+        prompt_price, completion_price = PRICING.get(model, (0.0, 0.0))
+        cost = (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1000
+
+        with self._inflight_lock:
+            self._metrics["failures"] += 0 if ok else 1
+            self._metrics["retries"] += retries
+            self._metrics["prompt_tokens"] += prompt_tokens
+            self._metrics["completion_tokens"] += completion_tokens
+            self._metrics["estimated_cost"] += cost
+            self._recent_calls.append({
+                "time": time.time(), "latency": latency, "retries": retries, "ok": ok,
+                "prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens, "cost": cost,
+            })
+
+        logging.info(
+            "openai_call model=%s ok=%s latency=%.3fs retries=%d prompt_tokens=%d completion_tokens=%d cost=$%.6f",
+            model, ok, latency, retries, prompt_tokens, completion_tokens, cost,
+        )
+
+    def _count_attempt(self, request):
+        # httpx request hook: runs in the calling thread once per attempt, retries included
+        self._attempts.count = getattr(self._attempts, "count", 0) + 1
+
+    @staticmethod
+    def _request_key(params):
+        return hashlib.sha256(json.dumps(params, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
     # Set Max tokens for GPT 3.5
     def analyze_text(self, messages, max_tokens=1500):
-        
+        params = {
+            "model": MODEL,
+            "messages": messages,
+            "temperature": 0,
+            "max_tokens": max_tokens
+        }
+        key = self._request_key(params)
+
+        with self._inflight_lock:
+            self._metrics["requests"] += 1
+            call = self._inflight.get(key)
+            is_leader = call is None
+            if is_leader:
+                call = _InFlightCall()
+                self._inflight[key] = call
+                self._metrics["api_calls"] += 1
+            else:
+                self._metrics["coalesced"] += 1
+
+        # Followers wait for the leader's outcome instead of sending their own request
+        if not is_leader:
+            call.done.wait()
+            if call.error:
+                raise call.error
+            return call.result
+
+        start = time.perf_counter()
+        response = None
+        self._attempts.count = 0
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=messages,
-                temperature=0,
-                max_tokens=max_tokens
-            )
+            response = self.client.chat.completions.create(**params)
             result = response.choices[0].message.content.strip()
-            return result if result else None
+            call.result = result if result else None
+            return call.result
         except Exception as e:
-            raise ValueError(f"OpenAI API error: {str(e)}")
+            call.error = ValueError(f"OpenAI API error: {str(e)}")
+            raise call.error
+        finally:
+            self._record_call(MODEL, time.perf_counter() - start, max(self._attempts.count - 1, 0),
+                              getattr(response, "usage", None), call.error is None)
+            with self._inflight_lock:
+                self._inflight.pop(key, None)
+            call.done.set()
 
 ai_client = OpenAIClient()
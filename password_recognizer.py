@@ -0,0 +1,70 @@
+import re
+from presidio_analyzer import EntityRecognizer, RecognizerResult
+
+# --- Configuration ---
+KEYWORDS = ["password", "passcode", "pw", "secret code"]
+WINDOW_WORDS = 5        # words after a keyword that may hold the password (Presidio's context window)
+PHRASE_WINDOW = 25      # characters after a phrase template, as in updated_autosummary_check.py
+KEYWORD_SCORE = 0.85    # same as pattern score 0.5 + Presidio's context boost 0.35
+PHRASE_SCORE = 0.9
+
+# ---- Examples of Passwords (from updated_autosummary_check.py) -----
+PHRASE_TEMPLATES = [
+    "with a password of", "ask for password, which was provided as", "new password",
+    "password is", "password as", "password to", "password was", "password, which was",
+    "provided password", "temporary password", "the password", "temporary one",
+    "with the password",
+]
+
+CANDIDATE = re.compile(r"\b\S{4,}\b")
+
+
+def _alternation(terms):
+    # Longest first so "with the password" wins over "the password"
+    return "|".join(re.escape(t) for t in sorted(terms, key=len, reverse=True))
+
+
+class KeywordPasswordRecognizer(EntityRecognizer):
+    """
+    PASSWORD recognizer that looks for the keywords and phrase templates first
+    and only emits candidates in a bounded window right after each of them,
+    instead of one candidate for every 4+ character word in the note.
+    """
+
+    def __init__(self, keywords=KEYWORDS, phrases=PHRASE_TEMPLATES, supported_language="en"):
+        self.keyword_regex = re.compile(rf"\b(?:{_alternation(keywords)})", re.IGNORECASE)
+        self.phrase_regex = re.compile(rf"(?:{_alternation(phrases)})", re.IGNORECASE)
+        # Notes that match neither can never produce a PASSWORD result
+        self.candidate_regex = rf"\b(?:{_alternation(keywords)})|(?:{_alternation(phrases)})"
+        self.window_regex = re.compile(r"\S*(?:\s+\S+){0,%d}" % WINDOW_WORDS)
+        super().__init__(
+            supported_entities=["PASSWORD"],
+            name="KeywordPasswordRecognizer",
+            supported_language=supported_language,
+        )
+
+    def load(self):
+        pass
+
+    def analyze(self, text, entities, nlp_artifacts=None):
+        found = {}
+
+        # Phrase templates: first 4+ character token within PHRASE_WINDOW characters
+        for phrase in self.phrase_regex.finditer(text):
+            window_end = min(len(text), phrase.end() + PHRASE_WINDOW + 1)
+            match = CANDIDATE.search(text, phrase.end(), window_end)
+            if match:
+                found[match.span()] = max(found.get(match.span(), 0), PHRASE_SCORE)
+
+        # Keywords: every 4+ character token in the next WINDOW_WORDS words
+        for keyword in self.keyword_regex.finditer(text):
+            window = self.window_regex.match(text, keyword.end())
+            if not window:
+                continue
+            for match in CANDIDATE.finditer(text, window.start(), window.end()):
+                found[match.span()] = max(found.get(match.span(), 0), KEYWORD_SCORE)
+
+        return [
+            RecognizerResult(entity_type="PASSWORD", start=start, end=end, score=score)
+            for (start, end), score in sorted(found.items())
+        ]
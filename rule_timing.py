@@ -0,0 +1,126 @@
+import os
+import re
+import csv
+import time
+from contextlib import contextmanager
+
+# --- Configuration ---
+RULE_TIME_BUDGET = 0.05     # seconds one rule may spend on one note
+WINDOW_CHARS = 2000         # long notes are scanned window by window ...
+WINDOW_OVERLAP = 200        # ... with enough overlap for any bounded pattern match
+MAX_PRESIDIO_CHARS = 10000  # Presidio only sees this many characters of a note
+REPORT_TOP_N = 15
+DIAGNOSTICS_FILE = 'scan_diagnostics.csv'   # notes that were not scanned completely (not NG reasons)
+
+
+class RuleTimer:
+    """
+    Per-rule timing and time budgets for the audit checkers.
+    search() scans long notes in overlapping windows and stops once a rule has
+    used up its budget for the current note; the rule is then listed in
+    overruns so the caller can flag the note instead of stalling the run.
+    Timing totals and hit counts are only collected when enabled.
+    Truncated or over-budget notes are kept as notices, separate from the NG
+    reasons, and written to DIAGNOSTICS_FILE by flush_notices().
+    """
+
+    def __init__(self, enabled=False, rule_budget=RULE_TIME_BUDGET):
+        self.enabled = enabled
+        self.rule_budget = rule_budget
+        self.stats = {}
+        self.overruns = []
+        self.notices = []
+        self.notice_counts = {}
+
+    def start_note(self):
+        """Resets the per-note overrun list; call once per note."""
+        self.overruns = []
+
+    def _record(self, rule, elapsed, hit):
+        if not self.enabled:
+            return
+        stat = self.stats.setdefault(rule, {'time': 0.0, 'calls': 0, 'hits': 0, 'max': 0.0})
+        stat['time'] += elapsed
+        stat['calls'] += 1
+        stat['hits'] += int(hit)
+        stat['max'] = max(stat['max'], elapsed)
+
+    def search(self, rule, pattern, text, flags=0):
+        """re.search under the rule's time budget; returns True on a match."""
+        regex = re.compile(pattern, flags)
+        start = time.perf_counter()
+        hit = False
+        step = WINDOW_CHARS - WINDOW_OVERLAP
+        for offset in range(0, max(len(text) - WINDOW_OVERLAP, 1), step):
+            # pos/endpos instead of slicing so \b still sees the text before the window
+            endpos = min(len(text), offset + WINDOW_CHARS)
+            match = regex.search(text, offset, endpos)
+            if match and match.end() == endpos < len(text):
+                # The window edge may have cut a word: re-check from the match start
+                match = regex.match(text, match.start(), min(len(text), match.start() + WINDOW_CHARS))
+            if match:
+                hit = True
+                break
+            if time.perf_counter() - start > self.rule_budget:
+                self.overruns.append(rule)
+                break
+        self._record(rule, time.perf_counter() - start, hit)
+        return hit
+
+    def add_notice(self, row, notice):
+        """Records that a note was not scanned completely (e.g. a rule ran out of budget)."""
+        self.notices.append({'Contact_ID': row.get('Contact_ID', ''), 'Date': row.get('Date', ''), 'Notice': notice})
+        key = notice.split('(')[0].strip()
+        self.notice_counts[key] = self.notice_counts.get(key, 0) + 1
+
+    def add_note_notices(self, row, truncated=False):
+        """Notices for the current note: truncated AI scan and every rule that overran its budget."""
+        if truncated:
+            self.add_notice(row, "Note Truncated (AI Scan)")
+        for rule in self.overruns:
+            self.add_notice(row, f"Scan Budget Exceeded({rule})")
+
+    def flush_notices(self, path=DIAGNOSTICS_FILE):
+        """Appends the collected notices to the diagnostics CSV; returns how many were written."""
+        if not self.notices:
+            return 0
+        is_new = not os.path.exists(path) or os.path.getsize(path) == 0
+        with open(path, mode='a', encoding='utf-8-sig' if is_new else 'utf-8', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=['Contact_ID', 'Date', 'Notice'])
+            if is_new:
+                writer.writeheader()
+            writer.writerows(self.notices)
+        count = len(self.notices)
+        self.notices = []
+        return count
+
+    def discard_notices(self):
+        """Drops the notices not written yet (their batch will be scanned again)."""
+        for notice in self.notices:
+            key = notice['Notice'].split('(')[0].strip()
+            self.notice_counts[key] -= 1
+        self.notices = []
+
+    @contextmanager
+    def stage(self, name):
+        """Times a block (e.g. a Presidio call) as one rule; set result['hit'] inside."""
+        start = time.perf_counter()
+        result = {'hit': False}
+        try:
+            yield result
+        finally:
+            self._record(name, time.perf_counter() - start, result['hit'])
+
+    def report(self, top_n=REPORT_TOP_N):
+        """Prints the most expensive rules by cumulative time, then the scan notice counts."""
+        for notice, count in sorted(self.notice_counts.items()):
+            print(f"Scan notice: {notice}: {count} note(s) (see {DIAGNOSTICS_FILE})")
+        if not self.stats:
+            print("Rule timing: no data (instrumentation disabled or nothing scanned).")
+            return
+        total = sum(stat['time'] for stat in self.stats.values()) or 1
+        ranked = sorted(self.stats.items(), key=lambda item: item[1]['time'], reverse=True)
+        print(f"{'Rule':<40} {'Total(s)':>9} {'Share':>6} {'Calls':>8} {'Hits':>7} {'Max(ms)':>8}")
+        for rule, stat in ranked[:top_n]:
+            print(f"{rule[:40]:<40} {stat['time']:>9.3f} {stat['time'] / total:>6.1%} "
+                  f"{stat['calls']:>8} {stat['hits']:>7} {stat['max'] * 1000:>8.1f}")
@@ -0,0 +1,225 @@
+import json
+import time
+import numpy as np
+import pandas as pd
+
+# --- Configuration ---
+DEFAULT_BACKEND = "exact"      # "exact" (NumPy brute force) or "hnsw" (hnswlib)
+HNSW_M = 32                    # graph degree: higher = better recall, more memory
+HNSW_EF_CONSTRUCTION = 200
+HNSW_EF_SEARCH = 100           # search breadth: higher = better recall, slower
+CANDIDATES_PER_INTENT = 10     # neighbours fetched per requested intent (ANN only) ...
+EXAMPLE_BLOCK = 65536          # exact search: examples per score block ...
+SCORE_BLOCK = 1 << 24          # ... and at most this many scores (64 MB float32) held at once
+CANDIDATE_GROWTH = 4           # ... widened by this factor while a query has fewer than k distinct intents
+
+
+def normalize(vectors):
+    """Row-normalize so that inner product == cosine similarity."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+def _top_k(scores, k):
+    """Indices and values of the k highest scores per row, best first."""
+    k = min(k, scores.shape[1])
+    idx = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    top = np.take_along_axis(scores, idx, axis=1)
+    order = np.argsort(-top, axis=1)
+    return np.take_along_axis(idx, order, axis=1), np.take_along_axis(top, order, axis=1)
+
+
+def _labelled(vectors, labels):
+    """
+    Drops examples without an intent (NaN / empty cells), as the old groupby
+    did, and returns the remaining labels as strings (numeric intent IDs too).
+    """
+    labels = pd.Series(labels, dtype=object)
+    keep = (~labels.isna() & (labels.astype(str).str.strip() != "")).to_numpy()
+    return np.asarray(vectors)[keep], labels[keep].astype(str).to_numpy(dtype=object)
+
+
+class ExactIndex:
+    """Brute-force cosine search over all examples (the reference result)."""
+
+    backend = "exact"
+
+    def build(self, vectors, labels):
+        vectors, labels = _labelled(vectors, labels)
+        # Keep examples grouped by intent so per-intent maxima are one reduceat
+        order = np.argsort(labels, kind="stable")
+        self.vectors = normalize(vectors)[order]
+        self.labels = labels[order]
+        self.intents, self.starts = np.unique(self.labels, return_index=True)
+        return self
+
+    def intent_scores(self, queries):
+        """
+        Max similarity of each query to each intent (queries x intents).
+        Scores are computed in blocks of queries x EXAMPLE_BLOCK examples with
+        a running max per intent, so memory stays at about SCORE_BLOCK scores.
+        """
+        queries = normalize(queries)
+        n_examples = len(self.vectors)
+        scores = np.full((len(queries), len(self.intents)), -np.inf, dtype=np.float32)
+        q_block = max(1, SCORE_BLOCK // max(1, min(n_examples, EXAMPLE_BLOCK)))
+
+        for q_start in range(0, len(queries), q_block):
+            q = queries[q_start:q_start + q_block]
+            rows = slice(q_start, q_start + len(q))
+            for e_start in range(0, n_examples, EXAMPLE_BLOCK):
+                e_end = min(e_start + EXAMPLE_BLOCK, n_examples)
+                sims = q @ self.vectors[e_start:e_end].T
+                # Intents with examples in this block: the one running into it and those starting in it
+                first = np.searchsorted(self.starts, e_start, side="right") - 1
+                last = np.searchsorted(self.starts, e_end, side="left")
+                offsets = np.maximum(self.starts[first:last] - e_start, 0)
+                block_max = np.maximum.reduceat(sims, offsets, axis=1)
+                np.maximum(scores[rows, first:last], block_max, out=scores[rows, first:last])
+        return scores
+
+    def top_intents(self, queries, k=3):
+        """Returns one [(intent, score), ...] list per query, best first."""
+        idx, scores = _top_k(self.intent_scores(queries), k)
+        return [
+            [(self.intents[i], float(s)) for i, s in zip(row_idx, row_scores)]
+            for row_idx, row_scores in zip(idx, scores)
+        ]
+
+    def save(self, path):
+        np.savez(path + ".npz", vectors=self.vectors, labels=self.labels.astype(str))
+        with open(path + ".meta.json", mode="w", encoding="utf-8") as f:
+            json.dump({"backend": self.backend}, f)
+
+    def load(self, path):
+        data = np.load(path + ".npz")
+        self.vectors = data["vectors"]
+        self.labels = data["labels"].astype(object)
+        self.intents, self.starts = np.unique(self.labels, return_index=True)
+        return self
+
+
+class HNSWIndex:
+    """Approximate cosine search using an HNSW graph (requires hnswlib)."""
+
+    backend = "hnsw"
+
+    def __init__(self, m=HNSW_M, ef_construction=HNSW_EF_CONSTRUCTION, ef_search=HNSW_EF_SEARCH):
+        try:
+            import hnswlib
+        except ImportError:
+            raise ImportError("The 'hnsw' backend needs hnswlib: pip install hnswlib")
+        self._hnswlib = hnswlib
+        self.m = m
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+
+    def build(self, vectors, labels):
+        vectors, self.labels = _labelled(vectors, labels)
+        vectors = normalize(vectors)
+        self.n_intents = len(set(self.labels))
+        self.index = self._hnswlib.Index(space="ip", dim=vectors.shape[1])
+        self.index.init_index(max_elements=len(vectors), M=self.m, ef_construction=self.ef_construction)
+        self.index.add_items(vectors, np.arange(len(vectors)))
+        self.index.set_ef(self.ef_search)
+        return self
+
+    def top_intents(self, queries, k=3):
+        """
+        Returns one [(intent, score), ...] list per query, best first.
+        Queries whose neighbours fall into fewer than k intents (one intent
+        dominating the neighbourhood) are searched again with a wider
+        candidate set, up to the whole index.
+        """
+        queries = normalize(queries)
+        k = min(k, self.n_intents)
+        results = [[] for _ in range(len(queries))]
+        pending = np.arange(len(queries))
+        n_candidates = min(len(self.labels), k * CANDIDATES_PER_INTENT)
+
+        while len(pending):
+            self.index.set_ef(max(self.ef_search, n_candidates))
+            ids, distances = self.index.knn_query(queries[pending], k=n_candidates)
+
+            short = []
+            for q, row_ids, row_dist in zip(pending, ids, distances):
+                # hnswlib "ip" distance is 1 - inner product; keep the best hit per intent
+                best = {}
+                for i, d in zip(row_ids, row_dist):
+                    intent = self.labels[i]
+                    if intent not in best:
+                        best[intent] = 1.0 - float(d)
+                    if len(best) == k:
+                        break
+                results[q] = list(best.items())
+                if len(best) < k and n_candidates < len(self.labels):
+                    short.append(q)
+
+            pending = np.array(short, dtype=np.int64)
+            n_candidates = min(len(self.labels), n_candidates * CANDIDATE_GROWTH)
+        return results
+
+    def save(self, path):
+        self.index.save_index(path + ".hnsw")
+        np.save(path + ".labels.npy", self.labels.astype(str))
+        with open(path + ".meta.json", mode="w", encoding="utf-8") as f:
+            json.dump({"backend": self.backend, "dim": self.index.dim, "m": self.m,
+                       "ef_construction": self.ef_construction, "ef_search": self.ef_search}, f)
+
+    def load(self, path):
+        with open(path + ".meta.json", mode="r", encoding="utf-8") as f:
+            meta = json.load(f)
+        self.m, self.ef_construction, self.ef_search = meta["m"], meta["ef_construction"], meta["ef_search"]
+        self.labels = np.load(path + ".labels.npy").astype(object)
+        self.n_intents = len(set(self.labels))
+        self.index = self._hnswlib.Index(space="ip", dim=meta["dim"])
+        self.index.load_index(path + ".hnsw", max_elements=len(self.labels))
+        self.index.set_ef(self.ef_search)
+        return self
+
+
+BACKENDS = {"exact": ExactIndex, "hnsw": HNSWIndex}
+
+
+def create_index(backend=DEFAULT_BACKEND, **kwargs):
+    """Returns an empty index for the given backend name."""
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown index backend '{backend}'. Choose from: {', '.join(BACKENDS)}")
+    return BACKENDS[backend](**kwargs)
+
+
+def load_index(path):
+    """Loads an index saved with .save(path), whichever backend built it."""
+    with open(path + ".meta.json", mode="r", encoding="utf-8") as f:
+        backend = json.load(f)["backend"]
+    return create_index(backend).load(path)
+
+
+def recall_at_k(approx_results, exact_results, k=3):
+    """Share of the exact top-k intents that the approximate search also returned."""
+    hits = total = 0
+    for approx, exact in zip(approx_results, exact_results):
+        expected = {intent for intent, _ in exact[:k]}
+        found = {intent for intent, _ in approx[:k]}
+        hits += len(expected & found)
+        total += len(expected)
+    return hits / total if total else 1.0
+
+
+def report_recall(index, vectors, labels, queries, k=3):
+    """Prints recall@k and query time of index against an exact search on the same data."""
+    exact = ExactIndex().build(vectors, labels)
+
+    t0 = time.perf_counter()
+    approx_results = index.top_intents(queries, k)
+    approx_time = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    exact_results = exact.top_intents(queries, k)
+    exact_time = time.perf_counter() - t0
+
+    recall = recall_at_k(approx_results, exact_results, k)
+    print(f"[{index.backend}] recall@{k}: {recall:.4f} "
+          f"({len(queries)} queries, {approx_time:.3f}s vs exact {exact_time:.3f}s)")
+    return recall
@@ -1,22 +1,29 @@
 import csv
 import re
 import os
+from audit_ingest import read_batches, read_header, report_fieldnames, to_source_row
+from rule_timing import RuleTimer, DIAGNOSTICS_FILE
 
 INPUT_FILE = 'Data.csv'
+INPUT_PROFILE = 'autosummary'   # schema profile in audit_ingest.SCHEMA_PROFILES
 OUTPUT_FILE = 'ng_report.csv'
+PROFILE_RULES = False   # print per-rule timing and hit counts at the end
 
 PROFANITY_LIST = ['JESUS CHRIST', 'DAMN IT', 'GOD damn','HELL','HOLY COW','SHIT','FUCK', 'FUCKING', 
                   'ASSHOLE','BASTARD','CRAP','PISS','IDIOT','DUMB', 'SHUT UP','GET LOST','Bitch', 'lazy']
 
+# Per-rule timing and per-note time budgets
+rule_timer = RuleTimer(enabled=PROFILE_RULES)
+
 
 def check_logic(row):
 
     errors = []
     
     contact_id =row.get('Contact_ID', '')
-    agent_time_str = row.get('Agent_time', '')
-    note = row.get('Disp_Comments', '')
-    skill = row.get('Skill_Name', '')
+    agent_time_str = row.get('Agent_Time', '')
+    note = row.get('Note', '')
+    skill = row.get('Skill', '')
 
     # Check if Contact ID exists
     if not contact_id:
@@ -35,17 +42,19 @@ def check_logic(row):
         else:
             return None
         
+    rule_timer.start_note()
+
     # Check if Profanity exists
     for word in PROFANITY_LIST:
-        if re.search(rf'\b{word}\b', note, re.IGNORECASE):
+        if rule_timer.search(f"Profanity({word})", rf'\b{word}\b', note, re.IGNORECASE):
             errors.append(f"Profanity Detected ({word})")
 
     # Credit Card Check
-    if re.search(r'\b(credit card|card number)\b.{0,20}\d{4}-\d{4}-\d{4}-\d{4}', note, re.IGNORECASE):
+    if rule_timer.search("Credit Card Number", r'\b(credit card|card number)\b.{0,20}\d{4}-\d{4}-\d{4}-\d{4}', note, re.IGNORECASE):
         errors.append("Credit Card Number")
 
     # CVV check
-    if re.search(r'(CVV|security code).{0,20}\d{3,4}', note, re.IGNORECASE):
+    if rule_timer.search("CVV", r'(CVV|security code).{0,20}\d{3,4}', note, re.IGNORECASE):
         errors.append("CVV")
 
     # # Phone Number
@@ -72,13 +81,16 @@ def check_logic(row):
     # temporary one
     # with the password “____"
 
-    if re.search(r'(with a password of|ask for password, which was provided as|new password|password is|password as|password is|password to|password was|password, which was|provided password|temporary password|the password|temporary one|with the password).{0,25}\S{4,}', note, re.IGNORECASE):
+    if rule_timer.search("Password", r'(with a password of|ask for password, which was provided as|new password|password is|password as|password is|password to|password was|password, which was|provided password|temporary password|the password|temporary one|with the password).{0,25}\S{4,}', note, re.IGNORECASE):
         errors.append("Password")
 
     # PIN check
-    if re.search(r'\b(PIN|verification|verified|security code)\b.{0,20}\d{4}', note, re.IGNORECASE):
+    if rule_timer.search("PIN", r'\b(PIN|verification|verified|security code)\b.{0,20}\d{4}', note, re.IGNORECASE):
         errors.append("PIN")
 
+    # Runaway inputs are noted in the diagnostics file instead of blocking the run
+    rule_timer.add_note_notices(row)
+
     # If any errors are found, attach the reasons to the row
     if errors:
         row['Reason_for_Error'] = " / ".join(errors)
@@ -92,20 +104,16 @@ def main():
     
     ng_list = []
 
-    # Open the input file
-    with open(INPUT_FILE, mode='r', encoding='utf-8-sig') as f:
-        reader = csv.DictReader(f)
-        original_fieldnames = reader.fieldnames
-        for row in reader:
+    # Read the input file in columnar batches (canonical field names)
+    for batch in read_batches(INPUT_FILE, INPUT_PROFILE):
+        for row in batch:
             result = check_logic(row)
             if result:
                 ng_list.append(result)
 
 
     if ng_list:
-        output_fieldnames = list(original_fieldnames)
-        if "Reason_for_Error" not in output_fieldnames:
-            output_fieldnames.append("Reason_for_Error")
+        output_fieldnames = report_fieldnames(read_header(INPUT_FILE), INPUT_PROFILE)
         
         with open(OUTPUT_FILE, mode='w', encoding='utf-8-sig', newline='') as f:
             writer = csv.DictWriter(f, fieldnames=output_fieldnames, extrasaction='ignore')
@@ -113,7 +121,7 @@ def main():
             
             # Ensure to write the correct format only
             # print(ng_list)
-            valid_data = [row for row in ng_list if isinstance(row, dict)]
+            valid_data = [to_source_row(row, INPUT_PROFILE) for row in ng_list if isinstance(row, dict)]
             writer.writerows(valid_data)
 
         print(f"Inspction Completed: {len(ng_list)} NG items found. See {OUTPUT_FILE}")
@@ -121,6 +129,13 @@ def main():
     else:
         print("Inspection Completed: No NG found")
 
+    notices = rule_timer.flush_notices()
+    if notices:
+        print(f"{notices} note(s) were not scanned completely. See {DIAGNOSTICS_FILE}")
+
+    if rule_timer.enabled:
+        rule_timer.report()
+
 if __name__ == "__main__":
     main()
 
@@ -1,20 +1,37 @@
+import os
+import time
+import asyncio
 import httpx
+from collections import deque
 from fastapi import FastAPI, Request, BackgroundTasks
+from fastapi.concurrency import run_in_threadpool
 from presidio_analyzer import AnalyzerEngine
 from presidio_anonymizer import AnonymizerEngine
 from presidio_anonymizer.entities import OperatorConfig
+from webhook_dedupe import IdempotencyCache, delivery_key
 
 app = FastAPI()
 
 # --- 1. Configuration (Obtain these from your NICE CXone admin) ---
-# Your regional base URL (e.g., na1, jp1, au1)
-CXONE_BASE_URL = "https://api-jp1.niceincontact.com" 
+# Your regional base URL (e.g., na1, jp1, au1); override with CXONE_BASE_URL to target a mock
+CXONE_BASE_URL = os.getenv("CXONE_BASE_URL", "https://api-jp1.niceincontact.com")
 CLIENT_ID = "YOUR_CLIENT_ID"
 CLIENT_SECRET = "YOUR_CLIENT_SECRET"
 
+# Duplicate deliveries (CXone retries) are acknowledged without reprocessing.
+# Set DEDUPE_DB_PATH to share the seen deliveries between workers via SQLite.
+DEDUPE_DB_PATH = os.getenv("DEDUPE_DB_PATH")
+
+# Opt-in event-loop lag probe (e.g. LAG_PROBE_INTERVAL=0.05 during a load test);
+# samples are served on /debug/loop-lag. 0 disables it.
+LAG_PROBE_INTERVAL = float(os.getenv("LAG_PROBE_INTERVAL", "0"))
+LAG_PROBE_MAX_SAMPLES = 100000
+
 # Initialize Presidio Engines
 analyzer = AnalyzerEngine()
 anonymizer = AnonymizerEngine()
+dedupe = IdempotencyCache(db_path=DEDUPE_DB_PATH)
+lag_samples = deque(maxlen=LAG_PROBE_MAX_SAMPLES)
 
 # --- 2. Redaction Logic ---
 def redact_sensitive_info(text):
@@ -55,8 +72,10 @@ async def update_cxone_summary(contact_id, clean_text):
         response = await client.put(url, json={"summary": clean_text}, headers=headers)
         if response.status_code == 200:
             print(f"Successfully redacted Contact ID: {contact_id}")
+            return True
         else:
             print(f"Failed to update ID {contact_id}: {response.text}")
+            return False
 
 # --- 4. WebHook Endpoint ---
 @app.post("/webhook/summary-generated")
@@ -72,17 +91,54 @@ async def handle_webhook(request: Request, background_tasks: BackgroundTasks):
     if not contact_id or not raw_text:
         return {"status": "ignored", "reason": "missing data"}
 
+    key = delivery_key(contact_id, raw_text)
+    # SQLite may wait on other workers' writes; keep it off the event loop
+    if not await run_in_threadpool(dedupe.claim, key):
+        return {"status": "duplicate"}
+
     # Run the heavy redaction and API call in the background 
     # to respond to CXone immediately and prevent timeouts.
-    background_tasks.add_task(process_redaction_flow, contact_id, raw_text)
+    background_tasks.add_task(process_redaction_flow, contact_id, raw_text, key)
 
     return {"status": "received"}
 
-async def process_redaction_flow(contact_id, text):
-    # Perform redaction
-    clean_text = redact_sensitive_info(text)
-    # Update CXone via API
-    await update_cxone_summary(contact_id, clean_text)
+@app.get("/webhook/stats")
+async def webhook_stats():
+    """Delivery counters, including how many duplicates were skipped."""
+    return dedupe.get_stats()
+
+@app.get("/debug/loop-lag")
+async def loop_lag():
+    """Event-loop lag samples in seconds (empty unless LAG_PROBE_INTERVAL is set)."""
+    return {"interval": LAG_PROBE_INTERVAL, "samples": list(lag_samples)}
+
+async def probe_loop_lag():
+    """Samples how late asyncio.sleep wakes up, i.e. how long the loop was blocked."""
+    while True:
+        expected = time.perf_counter() + LAG_PROBE_INTERVAL
+        await asyncio.sleep(LAG_PROBE_INTERVAL)
+        lag_samples.append(max(0.0, time.perf_counter() - expected))
+
+async def start_lag_probe():
+    app.state.lag_probe = asyncio.create_task(probe_loop_lag())
+
+if LAG_PROBE_INTERVAL > 0:
+    app.router.on_startup.append(start_lag_probe)
+
+async def process_redaction_flow(contact_id, text, key):
+    try:
+        # Perform redaction
+        clean_text = redact_sensitive_info(text)
+        # Update CXone via API
+        updated = await update_cxone_summary(contact_id, clean_text)
+    except Exception as e:
+        print(f"Redaction flow failed for Contact ID {contact_id}: {e}")
+        updated = False
+    # Keep a written-back delivery for the full TTL; let CXone's retry of a failed one through again
+    if updated:
+        await run_in_threadpool(dedupe.complete, key)
+    else:
+        await run_in_threadpool(dedupe.release, key)
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,108 @@
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+
+# --- Configuration ---
+DEDUPE_TTL_SECONDS = 24 * 60 * 60   # a delivery is a duplicate if seen within this window
+DEDUPE_LEASE_SECONDS = 5 * 60       # a claimed delivery not completed within this window can be claimed again
+DEDUPE_MAX_ENTRIES = 100000         # in-memory cache size (oldest entries are evicted first)
+
+
+def delivery_key(contact_id, summary_text):
+    """Idempotency key of a webhook delivery: contactId + hash of the summary text."""
+    digest = hashlib.sha256(summary_text.encode("utf-8")).hexdigest()
+    return f"{contact_id}:{digest}"
+
+
+class IdempotencyCache:
+    """
+    Bounded TTL set of delivery keys already accepted for processing.
+    claim() only takes a short processing lease; complete() extends it to the
+    full TTL once the delivery was processed, so a worker that dies mid-way
+    does not turn the sender's retries into duplicates for a whole day.
+    With db_path the keys are also kept in a local SQLite table, so several
+    workers on the same host (and a restarted worker) share what was seen.
+    The in-memory cache only holds keys this worker claimed itself (only the
+    claiming worker releases a key), so it answers their repeats without
+    touching the database and never hides a key another worker released.
+    The methods block on SQLite; call them from a thread in async code.
+    """
+
+    def __init__(self, ttl=DEDUPE_TTL_SECONDS, max_entries=DEDUPE_MAX_ENTRIES, db_path=None,
+                 lease=DEDUPE_LEASE_SECONDS):
+        self.ttl = ttl
+        self.lease = lease
+        self.max_entries = max_entries
+        self.entries = OrderedDict()   # key -> expiry time
+        self.lock = threading.Lock()
+        self.db_lock = threading.Lock()   # one shared connection, used by one thread at a time
+        self.stats = {"received": 0, "duplicates": 0, "completed": 0, "released": 0}
+        self.db = None
+        if db_path:
+            self.db = sqlite3.connect(db_path, timeout=5, check_same_thread=False, isolation_level=None)
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute("CREATE TABLE IF NOT EXISTS seen_deliveries (key TEXT PRIMARY KEY, expires REAL NOT NULL)")
+            self.db.execute("DELETE FROM seen_deliveries WHERE expires < ?", (time.time(),))
+
+    def claim(self, key):
+        """
+        Returns True the first time a key is seen (or its lease expired), False for
+        duplicates. The caller must complete() or release() the key afterwards.
+        """
+        now = time.time()
+        with self.lock:
+            self.stats["received"] += 1
+            expires = self.entries.get(key)
+            if expires is not None and expires >= now:
+                self.stats["duplicates"] += 1
+                return False
+            if self.db is None:
+                self._remember(key, now + self.lease)
+                return True
+
+        # Another worker may have claimed it first; the insert decides atomically
+        with self.db_lock:
+            self.db.execute("DELETE FROM seen_deliveries WHERE key = ? AND expires < ?", (key, now))
+            inserted = self.db.execute(
+                "INSERT OR IGNORE INTO seen_deliveries (key, expires) VALUES (?, ?)", (key, now + self.lease)
+            ).rowcount
+
+        with self.lock:
+            if not inserted:
+                # Not cached: the claiming worker may release it for a retry
+                self.stats["duplicates"] += 1
+                return False
+            self._remember(key, now + self.lease)
+            return True
+
+    def complete(self, key):
+        """Keeps a processed key for the full TTL, so later retries are duplicates."""
+        expires = time.time() + self.ttl
+        with self.lock:
+            if key in self.entries:
+                self.entries[key] = expires
+            self.stats["completed"] += 1
+        if self.db is not None:
+            with self.db_lock:
+                self.db.execute("UPDATE seen_deliveries SET expires = ? WHERE key = ?", (expires, key))
+
+    def release(self, key):
+        """Forgets a key whose processing failed, so the sender's retry is processed again."""
+        with self.lock:
+            self.entries.pop(key, None)
+            self.stats["released"] += 1
+        if self.db is not None:
+            with self.db_lock:
+                self.db.execute("DELETE FROM seen_deliveries WHERE key = ?", (key,))
+
+    def _remember(self, key, expires):
+        self.entries[key] = expires
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def get_stats(self):
+        with self.lock:
+            return dict(self.stats, cached=len(self.entries))